@@ -1,2 +1,2 @@
-from api import oauth, users
+from api import debug, events, oauth, search, tickets, users
 from api.app import api_main
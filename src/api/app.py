@@ -1,19 +1,117 @@
+import asyncio, logging, typing
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-import config
+import config, hashing, metrics, models, profiler
 from models import orm
+from api.responses import PYDResponse, PYDRoute
+
+BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+def run_periodically(
+        fn: typing.Callable[[], typing.Awaitable[typing.Any]],
+        interval: float):
+    """
+    Awaits `fn` every `interval` seconds for the
+    lifetime of the application.
+    """
+
+    logger = logging.getLogger("uvicorn.error")
+
+    async def runner():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await fn()
+            except Exception:
+                logger.exception(f"background task {fn.__qualname__} failed")
+
+    task = asyncio.create_task(runner())
+    BACKGROUND_TASKS.add(task)
+    return task
+
+
+def run_in_background(fn: typing.Callable[[], typing.Awaitable[typing.Any]]):
+    """
+    Awaits `fn` once, for as long as it runs, for
+    the lifetime of the application.
+    """
+
+    task = asyncio.create_task(fn())
+    BACKGROUND_TASKS.add(task)
+    return task
+
+
+def cancel_background_tasks():
+    """Stops tasks started by `run_periodically`."""
+
+    for task in BACKGROUND_TASKS:
+        task.cancel()
+    BACKGROUND_TASKS.clear()
 
 
 STARTUP_TASKS =\
 (
     lambda: orm.initialize(),
+    lambda: orm.warm_pool(),
+    orm.async_warm_pool,
+    lambda: run_in_background(models.listen_events),
+    models.async_refresh_revoked_sessions,
+    lambda: run_periodically\
+    (
+        models.async_refresh_revoked_sessions,
+        config.SECURITY_REVOCATION_REFRESH
+    ),
+)
+
+if config.SECURITY_SESSION_SWEEP_INTERVAL:
+    STARTUP_TASKS +=\
+    (
+        lambda: run_periodically\
+        (
+            models.async_sweep_expired_sessions,
+            config.SECURITY_SESSION_SWEEP_INTERVAL
+        ),
+    )
+
+SHUTDOWN_TASKS =\
+(
+    lambda: cancel_background_tasks(),
+    lambda: hashing.shutdown(),
 )
 
 api_main = FastAPI\
 (
     debug=(config.DEVELOPMENT_MODE is config.DEV_DEBUG),
-    on_startup=STARTUP_TASKS
+    on_startup=STARTUP_TASKS,
+    on_shutdown=SHUTDOWN_TASKS,
+    default_response_class=PYDResponse
 )
+api_main.router.route_class = PYDRoute
+
+if config.METRICS_ENABLED:
+    api_main.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(orm.orm_engine())
+    metrics.instrument_engine(orm.async_orm_engine().sync_engine)
+
+    metrics.register_collector("compass_hashing", hashing.stats)
+    metrics.register_collector("compass_session_cache", models.users.session_cache.stats)
+    metrics.register_collector("compass_user_lookups", models.users.lookup_flights.stats)
+    metrics.register_collector("compass_session_sweeper", lambda: models.users.sweeper_stats)
+    metrics.register_collector("compass_events", models.events.hub.stats)
+
+    @api_main.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        return PlainTextResponse\
+        (
+            metrics.expose(),
+            media_type="text/plain; version=0.0.4"
+        )
+
+if config.PROFILING_ENABLED:
+    api_main.add_middleware(profiler.ProfilerMiddleware)
 
 
 @api_main.get("/")
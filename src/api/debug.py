@@ -0,0 +1,63 @@
+from fastapi import HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+# Only import the Pydantic `models` at this level.
+# Any interactions with the orm should happen at
+# the txllayer.
+import config, profiler
+from models import pyd
+from api import users
+from api.app import api_main
+
+
+def _require_administrator(current_user: pyd.users.UserM):
+    if current_user.role != pyd.users.UserRoleEnum.ADMINISTRATOR:
+        raise HTTPException\
+        (
+            status_code=403,
+            detail="Not allowed to profile this worker.",
+        )
+
+
+async def _captured(capture):
+    try:
+        return PlainTextResponse(await capture)
+    except profiler.Busy as error:
+        raise HTTPException(status_code=409, detail=str(error))
+
+
+if config.PROFILING_ENABLED:
+    @api_main.get("/debug/profile", include_in_schema=False)
+    async def profile_worker(
+        current_user: users.RequiresCurrentUser,
+        seconds: float = Query(10.0, gt=0, le=config.PROFILING_MAX_SECONDS),
+        requests: int | None = Query(None, ge=1),
+        mode: str = Query("cprofile", regex=f"^({'|'.join(profiler.PROFILE_MODES)})$"),
+        sort: str = Query("cumulative", regex=f"^({'|'.join(profiler.PROFILE_SORTS)})$"),
+        limit: int = Query(50, ge=1, le=1000)):
+        """
+        Profile the worker serving this request for
+        `seconds`, or until `requests` other
+        requests were served.
+        """
+
+        _require_administrator(current_user)
+        return await _captured\
+            (profiler.profile(seconds, requests, mode=mode, sort=sort, limit=limit))
+
+    @api_main.get("/debug/memory", include_in_schema=False)
+    async def trace_worker_memory(
+        current_user: users.RequiresCurrentUser,
+        seconds: float = Query(10.0, gt=0, le=config.PROFILING_MAX_SECONDS),
+        requests: int | None = Query(None, ge=1),
+        group_by: str = Query("lineno", regex=f"^({'|'.join(profiler.MEMORY_GROUPS)})$"),
+        limit: int = Query(25, ge=1, le=1000)):
+        """
+        Diff the memory allocated by the worker
+        serving this request over `seconds`, or
+        until `requests` other requests were served.
+        """
+
+        _require_administrator(current_user)
+        return await _captured\
+            (profiler.trace_memory(seconds, requests, group_by=group_by, limit=limit))
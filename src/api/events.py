@@ -0,0 +1,158 @@
+import asyncio, contextlib
+
+from fastapi import HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+# Only import the Pydantic `models` at this level.
+# Any interactions with the orm should happen at
+# the txllayer.
+import common, config, models
+from models import pyd
+from api import oauth, users
+from api.app import api_main
+
+# Most topics one subscriber may follow.
+MAX_TOPICS = 100
+
+
+async def _subscribe(
+        current_user: pyd.users.UserM,
+        ticket_ids: list[common.UUID_t],
+        owner_ids: list[common.UUID_t]):
+    """
+    Subscribes to the given tickets and owners;
+    to what the current user owns if none given.
+    Only privileged users may follow the tickets
+    of others; anyone else only their own, or
+    those they are assigned.
+    """
+
+    if len(ticket_ids) + len(owner_ids) > MAX_TOPICS:
+        raise HTTPException\
+        (
+            status_code=400,
+            detail=f"Too many subscriptions, at most {MAX_TOPICS} allowed.",
+        )
+
+    if not (ticket_ids or owner_ids):
+        owner_ids = [current_user.id]
+
+    if not users.is_privileged(current_user):
+        allowed = await models.async_accessible_tickets(current_user.id, ticket_ids)\
+            if ticket_ids else set()
+        if set(owner_ids) - {current_user.id} or set(ticket_ids) - allowed:
+            raise HTTPException\
+            (
+                status_code=403,
+                detail="Not allowed to follow the records of other users.",
+            )
+    return models.subscribe_events(ticket_ids=ticket_ids, owner_ids=owner_ids)
+
+
+async def _websocket_user(websocket: WebSocket, token: str | None):
+    """
+    Authenticates a websocket from its `token`
+    query parameter or bearer authorization,
+    as browsers cannot set headers on them.
+    """
+
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated.")
+
+    return await users.current_user_of(oauth.decode_token(token))
+
+
+async def _send_events(websocket: WebSocket, subscription):
+    """
+    Sends events until the subscriber falls too
+    far behind, then closes the socket.
+    """
+
+    while (change := await subscription.get()) is not None:
+        await websocket.send_text(change.json())
+    await websocket.close(code=1013, reason="Subscriber fell behind.")
+
+
+async def _await_disconnect(websocket: WebSocket):
+    """Discards anything the client sends."""
+
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@api_main.websocket("/events")
+async def subscribe_events(
+    websocket: WebSocket,
+    token: str | None = None,
+    ticket_id: list[common.UUID_t] = Query([]),
+    owner_id: list[common.UUID_t] = Query([])):
+    """
+    Push ticket and message changes as JSON text
+    frames. Subscribes to what the user owns
+    unless tickets or owners are given.
+    """
+
+    try:
+        current_user = await _websocket_user(websocket, token)
+        subscribing = await _subscribe(current_user, ticket_id, owner_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    with subscribing as subscription:
+        tasks =\
+        {
+            asyncio.create_task(_send_events(websocket, subscription)),
+            asyncio.create_task(_await_disconnect(websocket)),
+        }
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            with contextlib.suppress(WebSocketDisconnect):
+                task.result()
+
+
+async def _event_stream(subscribing):
+    """
+    Formats events as server-sent events, with a
+    comment sent whenever the stream idles so
+    proxies keep it open.
+    """
+
+    with subscribing as subscription:
+        while True:
+            try:
+                change = await asyncio.wait_for(subscription.get(), config.EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if change is None:
+                yield "event: dropped\ndata: {}\n\n"
+                return
+            yield f"event: {change.action}\ndata: {change.json()}\n\n"
+
+
+@api_main.get("/events")
+async def stream_events(
+    current_user: users.RequiresCurrentUser,
+    ticket_id: list[common.UUID_t] = Query([]),
+    owner_id: list[common.UUID_t] = Query([])):
+    """
+    Stream ticket and message changes as
+    server-sent events, for clients unable to
+    open a websocket.
+    """
+
+    subscribing = await _subscribe(current_user, ticket_id, owner_id)
+    return StreamingResponse\
+    (
+        _event_stream(subscribing),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -6,7 +6,7 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 # Only import the Pydantic `models` at this level.
 # Any interactions with the orm should happen at
 # the txllayer.
-import common, config, models
+import common, config, hashing, models
 from models import pyd
 from api.app import api_main
 
@@ -15,22 +15,54 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 def decode_token(token: typing.Annotated[RA, Depends(oauth2_scheme)]):
-    return common.decode_token(token)
-
-
-RequiresAuth = typing.Annotated[RA, Depends(decode_token)]
-RequiresAuthForm = typing.Annotated[OAuth2PasswordRequestForm, Depends()]
+    # Signed tokens are verified in process so
+    # that forged, expired or revoked tokens never
+    # reach the database.
+    if not (config.SECURITY_TOKEN_KEY and common.is_signed_token(token)):
+        # Tokens which are not base64, or decode to
+        # nothing, name no session.
+        try:
+            session_id = common.decode_token(token)
+        except ValueError:
+            session_id = None
+    else:
+        claims = common.verify_session_token(token, config.SECURITY_TOKEN_KEY)
+        valid = claims and not models.session_is_revoked(claims.session_id)
+        session_id = claims.session_id if valid else None
+
+    if not session_id:
+        raise HTTPException\
+        (
+            status_code=401,
+            detail="Invalid authentication credentials.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return session_id
 
 
-def user_can_request_session(user: pyd.users.UserM):
+def encode_token(session: pyd.users.UserSessionM):
     """
-    Validates the number of sessions a User has.
+    Make the token handed to the user for the
+    given session, signed if a key is configured.
     """
 
-    return ((len(user.user_sessions) + 1) <= config.SECURITY_MAX_SESSIONS)
+    if not config.SECURITY_TOKEN_KEY:
+        return common.encode_token(session.id)
+
+    return common.sign_session_token\
+    (
+        session.owner_id,
+        session.id,
+        session.invalid_on,
+        config.SECURITY_TOKEN_KEY
+    )
+
+
+RequiresAuth = typing.Annotated[RA, Depends(decode_token)]
+RequiresAuthForm = typing.Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
-def authenticate_user_form(
+async def authenticate_user_form(
         form: RequiresAuthForm,
         request: Request,
         *,
@@ -41,11 +73,23 @@ def authenticate_user_form(
     match.
     """
 
-    users = models.do_user_lookup\
+    try:
+        password = await hashing.rotate_password_hash\
+            (form.password, *(hash_package or config.SECURITY_PASSWORD_HASHES))
+    except hashing.HashQueueFull:
+        raise HTTPException\
+        (
+            status_code=503,
+            detail="Too many login attempts in progress.",
+            headers={"Retry-After": "1"}
+        )
+
+    users = await models.async_do_user_lookup\
     (
         form.username,
-        common.rotate_password_hash(form.password, *(hash_package or [])),
-        expects_unique=True
+        password,
+        expects_unique=True,
+        plan=models.USER_AUTH_PLAN
     )
 
     if not users:
@@ -55,17 +99,21 @@ def authenticate_user_form(
             detail="Incorrect username or password."
         )
 
-    # If we were to add a new session, would this
-    # cause us an issue?
-    models.validate_user_sessions(users[0])
-    if not user_can_request_session(users[0]):
+    # Concurrent logins of one User may share the
+    # lookup, so each updates a copy of its own.
+    user = users[0].copy()
+
+    # Expired sessions no longer count against the
+    # limit, which is checked as the session is
+    # stored.
+    await models.async_validate_user_sessions(user)
+    session = await models.async_create_new_session(user, request)
+    if not session:
         raise HTTPException\
         (
             status_code=403, # Forbidden
             detail="Too many active sessions."
         )
-
-    session = models.create_new_session(users[0], request)
     return session
 
 
@@ -74,10 +122,18 @@ async def login(
     form_data: RequiresAuthForm, request: Request):
     """Attempt to authenticate as some user."""
 
-    session = authenticate_user_form(form_data, request)
+    session = await authenticate_user_form(form_data, request)
     return\
     {
-        "access_token": common.encode_token(session.id),
+        "access_token": encode_token(session),
         "expires_on": session.invalid_on,
         "token_type": "bearer"
     }
+
+
+@api_main.post("/logout")
+async def logout(token: RequiresAuth[bytes]):
+    """End the current user session."""
+
+    await models.async_revoke_session(token)
+    return {"message": "OK"}
@@ -0,0 +1,79 @@
+import functools, inspect, typing
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+# Only import the Pydantic `models` at this level.
+# Any interactions with the orm should happen at
+# the txllayer.
+import models
+from models import bases
+
+
+class PYDResponse(JSONResponse):
+    """
+    JSON response encoding Pydantic models, and
+    anything already made JSON compatible, in one
+    pass.
+    """
+
+    def render(self, content: typing.Any) -> bytes:
+        return models.encode_json(content)
+
+
+def _returns_model(route: APIRoute, content: typing.Any):
+    """
+    Whether `content` is exactly what the route
+    declares it responds with, so validating and
+    filtering it against the response model would
+    change nothing.
+    """
+
+    if route.response_model_include or route.response_model_exclude:
+        return False
+    if route.response_model_exclude_unset\
+        or route.response_model_exclude_defaults\
+        or route.response_model_exclude_none:
+        return False
+
+    model = route.response_model
+    if model is None:
+        return isinstance(content, bases.PYDBase)
+    if typing.get_origin(model) is list and isinstance(content, list):
+        item, = typing.get_args(model)
+        return all(type(value) is item for value in content)
+    return type(content) is model
+
+
+class PYDRoute(APIRoute):
+    """
+    Route responding with the models its endpoint
+    returns as they are, skipping FastAPI's second
+    validation and `jsonable_encoder` pass.
+    """
+
+    def __init__(self, path: str, endpoint: typing.Callable[..., typing.Any], **kwds):
+        super().__init__(path, endpoint, **kwds)
+
+        # The request handler looks the endpoint up
+        # through the dependant on each call, so it
+        # is wrapped there.
+        call = self.dependant.call
+        if inspect.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def respond(*args, **kwds):
+                return self._respond(await call(*args, **kwds))
+        else:
+            @functools.wraps(call)
+            def respond(*args, **kwds):
+                return self._respond(call(*args, **kwds))
+        self.dependant.call = respond
+
+    def _respond(self, content: typing.Any):
+        response_class = self.response_class
+        if not isinstance(response_class, type):
+            response_class = response_class.value
+
+        if not (issubclass(response_class, PYDResponse) and _returns_model(self, content)):
+            return content
+        return response_class(content, status_code=self.status_code or 200)
@@ -0,0 +1,37 @@
+from fastapi import HTTPException, Query
+
+# Only import the Pydantic `models` at this level.
+# Any interactions with the orm should happen at
+# the txllayer.
+import models
+from models import pyd
+from api import users
+from api.app import api_main
+
+
+@api_main.get("/search", response_model=pyd.search.SearchPageM)
+async def search(
+    current_user: users.RequiresCurrentUser,
+    q: str = Query(..., min_length=1, max_length=256),
+    scope: str = Query("tickets", regex="^(tickets|messages)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000)):
+    """
+    Search ticket descriptions or message content.
+    Hits are ranked best first; pass `next_offset`
+    back as `offset` to get the following page.
+    Users not privileged only find their tickets,
+    owned or assigned, and the messages on them.
+    """
+
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query has no words.")
+
+    return await models.async_search\
+    (
+        q,
+        scope=scope,
+        accessible_to=users.restricted_to(current_user),
+        limit=limit,
+        offset=offset
+    )
@@ -0,0 +1,164 @@
+import io
+
+from fastapi import HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+# Only import the Pydantic `models` at this level.
+# Any interactions with the orm should happen at
+# the txllayer.
+import common, models
+from models import pyd
+from api import users
+from api.app import api_main
+
+
+@api_main.get("/tickets", response_model=pyd.tickets.ServiceTicketPageM)
+async def read_tickets(
+    current_user: users.RequiresCurrentUser,
+    kind: pyd.tickets.TicketKindEnum | None = None,
+    status: pyd.tickets.TicketStatusEnum | None = None,
+    owner_id: common.UUID_t | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500)):
+    """
+    Get a page of service tickets, newest first.
+    Pass `next_cursor` back as `cursor` to get the
+    following page. Users not privileged only see
+    the tickets they own or are assigned.
+    """
+
+    if owner_id and owner_id != current_user.id and not users.is_privileged(current_user):
+        raise HTTPException\
+        (
+            status_code=403,
+            detail="Not allowed to list the records of other users.",
+        )
+
+    try:
+        return await models.async_list_tickets\
+        (
+            kind=kind,
+            status=status,
+            owner_id=owner_id,
+            accessible_to=users.restricted_to(current_user),
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@api_main.get("/tickets/export")
+async def export_tickets(
+    current_user: users.RequiresCurrentUser,
+    batch_size: int = Query(1000, ge=1, le=10000)):
+    """
+    Stream every service ticket, with its
+    messages, as newline delimited JSON.
+    """
+
+    if not users.is_privileged(current_user):
+        raise HTTPException\
+        (
+            status_code=403,
+            detail="Not allowed to export records.",
+        )
+
+    return StreamingResponse\
+    (
+        models.async_export_tickets(batch_size),
+        media_type="application/x-ndjson"
+    )
+
+
+@api_main.get("/tickets/counts", response_model=pyd.tickets.TicketCountsM)
+async def read_ticket_counts(
+    current_user: users.RequiresCurrentUser,
+    owner_id: common.UUID_t | None = None):
+    """
+    Get counts of tickets by kind and status, of
+    one owner or of everyone. Counts are kept as
+    tickets change, so are cheap to refresh.
+    Users not privileged only get their own.
+    """
+
+    if restricted_to := users.restricted_to(current_user):
+        if owner_id and owner_id != restricted_to:
+            raise HTTPException\
+            (
+                status_code=403,
+                detail="Not allowed to count the records of other users.",
+            )
+        owner_id = restricted_to
+
+    return await models.async_ticket_counts(owner_id)
+
+
+@api_main.post("/tickets/import", response_model=pyd.ingest.IngestReportM)
+async def import_tickets(
+    current_user: users.RequiresCurrentUser,
+    request: Request,
+    kind: str = Query("tickets", regex="^(tickets|messages)$"),
+    format: str = Query("ndjson", regex="^(csv|ndjson|yaml)$"),
+    chunk_size: int = Query(1000, ge=1, le=50000)):
+    """
+    Bulk load tickets or messages from the request
+    body. Rows failing validation are reported
+    per chunk rather than failing the upload.
+    """
+
+    if not users.is_privileged(current_user):
+        raise HTTPException\
+        (
+            status_code=403,
+            detail="Not allowed to import records.",
+        )
+
+    # Writes go through the synchronous engine, so
+    # are done off the event loop.
+    try:
+        stream = io.StringIO((await request.body()).decode())
+    except UnicodeDecodeError:
+        raise HTTPException\
+        (
+            status_code=400,
+            detail="Request body is not valid UTF-8.",
+        )
+    records = models.read_records(stream, format)
+    return await run_in_threadpool\
+        (models.ingest_records, records, kind, chunk_size=chunk_size)
+
+
+@api_main.post("/tickets/claim", response_model=list[pyd.tickets.ServiceTicketM])
+async def claim_tickets(
+    current_user: users.RequiresCurrentUser,
+    kind: pyd.tickets.TicketKindEnum | None = None,
+    limit: int = Query(1, ge=1, le=100)):
+    """
+    Assign the oldest unassigned tickets to the
+    current user. Concurrent claims never receive
+    the same ticket; an empty list means the queue
+    is drained. Only agents may claim tickets.
+    """
+
+    if not users.is_privileged(current_user):
+        raise HTTPException\
+        (
+            status_code=403,
+            detail="Not allowed to claim tickets.",
+        )
+
+    return await models.async_claim_tickets(current_user.id, kind=kind, limit=limit)
+
+
+@api_main.get("/tickets/{ticket_id}", response_model=pyd.tickets.ServiceTicketM)
+async def read_ticket(
+    current_user: users.RequiresCurrentUser,
+    ticket_id: common.UUID_t):
+    """Get a single service ticket."""
+
+    ticket = await models.async_get_ticket(ticket_id, accessible_to=users.restricted_to(current_user))
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found.")
+    return ticket
@@ -11,10 +11,20 @@ from api.app import api_main
 
 
 async def get_current_user(token: oauth.RequiresAuth[bytes]):
-    users = models.do_user_lookup\
+    return await current_user_of(token)
+
+
+async def current_user_of(session_id: bytes):
+    """
+    Get the user holding the given session, if it
+    is allowed to use this service.
+    """
+
+    users = await models.async_do_user_lookup\
     (
-        session_id=token,
-        expects_unique=True
+        session_id=session_id,
+        expects_unique=True,
+        plan=models.USER_AUTH_PLAN
     )
 
     if not users:
@@ -25,10 +35,11 @@ async def get_current_user(token: oauth.RequiresAuth[bytes]):
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    # Expired sessions never match the lookup; they
+    # are purged on login rather than per request.
     user = users[0]
-    models.validate_user_sessions(user)
 
-    status = pyd.users.UserStatusEnum(user.status)
+    status = models.enum_member(pyd.users.UserStatusEnum, user.status)
     enabled = pyd.users.UserStatusEnum.ENABLED
     if status is not enabled:
         raise HTTPException\
@@ -44,23 +55,44 @@ async def get_current_user(token: oauth.RequiresAuth[bytes]):
             detail="Not active user.",
         )
 
-    blacklist =\
-    (
-        "user_contacts",
-        "hashed_password",
-        "user_sessions",
-        "service_tickets"
-    )
-    return models.consume_pyd_object(user, blacklist=blacklist)
+    # Relationships and the password hash are never
+    # loaded by the auth plan. Copied as the cached
+    # User is shared between requests.
+    return user.copy()
 
 
 RequiresCurrentUser =\
     typing.Annotated[pyd.users.UserM, Depends(get_current_user)]
 
+# Roles trusted with the records of every user.
+PRIVILEGED_ROLES =\
+(
+    pyd.users.UserRoleEnum.ADMINISTRATOR,
+    pyd.users.UserRoleEnum.SERVICE
+)
+
+
+def is_privileged(user: pyd.users.UserM):
+    """Whether the User may act on anyone's records."""
+
+    return user.role in PRIVILEGED_ROLES
+
+
+def restricted_to(user: pyd.users.UserM):
+    """
+    The User whose records alone may be served to
+    it, or `None` when it may see anyone's.
+    """
+
+    return None if is_privileged(user) else user.id
+
 
-@api_main.get("/users/me")
+@api_main.get("/users/me", response_model=pyd.users.UserPublicM)
 async def read_users_me(
     current_user: RequiresCurrentUser):
     """Get the current user session."""
 
-    return current_user
+    # Only the public fields are copied, whatever
+    # the lookup plan loaded.
+    public = pyd.users.UserPublicM
+    return public.construct(**current_user.dict(include=set(public.__fields__)))
@@ -0,0 +1,462 @@
+"""
+Benchmarks of the authentication and translation
+hot paths. Endpoints are driven in process through
+the ASGI interface against a seeded SQLite
+database; see `actions bench`.
+
+This module must be imported in development mode
+so that the ORM is bound to SQLite, as seeding
+writes throwaway users and tickets.
+"""
+
+import asyncio, dataclasses, datetime, gc, inspect, json, sys, time, tracemalloc, typing
+import urllib.parse
+
+import common, config
+
+if config.DEVELOPMENT_MODE not in config.DEV_BASIC | config.DEV_DEBUG:
+    raise RuntimeError("benchmarks only run against the development database")
+
+import models
+from api import api_main, oauth
+from models import orm, pyd, txllayer
+from models.orm.engine import insert, select
+
+BENCH_PASSWORD = "bench-password"
+
+# Fields `sanitize_dict` removes, as done before
+# handing a User to a client.
+SANITIZED_FIELDS = ("hashed_password", "user_contacts.phone_number")
+
+
+@dataclasses.dataclass
+class Result:
+    """Timings and allocations of one operation."""
+
+    name: str
+    iterations: int
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    mean_us: float
+    ops_per_second: float
+    peak_bytes: float
+    retained_blocks: float
+
+
+@dataclasses.dataclass
+class Fixture:
+    """What was seeded, for operations to use."""
+
+    usernames: list[str]
+    tokens: list[str]
+    user: orm.users.User
+    user_model: pyd.users.UserM
+
+
+class ASGIClient:
+    """
+    Calls an ASGI application directly, without a
+    server or an HTTP client in between.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+            self,
+            method: str,
+            path: str,
+            *,
+            headers: dict[str, str] | None = None,
+            form: dict[str, str] | None = None,
+            body: bytes = b""):
+        """Returns the status and body of the response."""
+
+        headers = dict(headers or {})
+        if form is not None:
+            body = urllib.parse.urlencode(form).encode()
+            headers["content-type"] = "application/x-www-form-urlencoded"
+
+        path, _, query = path.partition("?")
+        scope =\
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+
+        # The client only disconnects once the whole
+        # response was sent, as streaming responses
+        # stop early otherwise.
+        sent, finished = False, asyncio.Event()
+        async def receive():
+            nonlocal sent
+            if sent:
+                await finished.wait()
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status, chunks = 0, []
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+def seed(users: int, sessions: int, tickets: int) -> Fixture:
+    """
+    Creates `users` users, each with `sessions`
+    sessions and `tickets` tickets.
+    """
+
+    orm.initialize()
+    now = common.current_timestamp()
+    invalid_on = common.future_timestamp(days=1)
+    password = common.rotate_password_hash(BENCH_PASSWORD, *config.SECURITY_PASSWORD_HASHES)
+
+    user_rows, contact_rows, session_rows, ticket_rows, tokens = [], [], [], [], []
+    for n in range(users):
+        user_id = common.new_uuid()
+        user_rows.append(dict\
+        (
+            id=user_id,
+            created_at=now,
+            updated_on=now,
+            role=pyd.users.UserRoleEnum.AUTHORIZED,
+            status=pyd.users.UserStatusEnum.ENABLED,
+            is_active=True,
+            hashed_password=password,
+            active_sessions=sessions
+        ))
+        contact_rows.append(dict\
+        (
+            owner_id=user_id,
+            created_at=now,
+            updated_on=now,
+            username=f"bench{n}",
+            first_name="Bench",
+            last_name=f"User{n}",
+            phone_number="5550000000"
+        ))
+        for _ in range(sessions):
+            session_id = common.new_session_token(user_id)
+            session_rows.append(dict\
+            (
+                id=session_id,
+                owner_id=user_id,
+                created_at=now,
+                updated_on=now,
+                ipaddress="127.0.0.1",
+                invalid_on=invalid_on
+            ))
+            tokens.append(oauth.encode_token(pyd.users.UserSessionM.construct\
+                (id=session_id, owner_id=user_id, invalid_on=invalid_on)))
+        for t in range(tickets):
+            ticket_rows.append(dict\
+            (
+                id=common.new_uuid(),
+                owner_id=user_id,
+                created_at=now - datetime.timedelta(seconds=t),
+                updated_on=now,
+                short_description=f"Ticket {t} of bench{n}",
+                long_description="Seeded for benchmarking.",
+                kind=pyd.tickets.TicketKindEnum.SERVICE,
+                status=pyd.tickets.TicketStatusEnum.UNASSIGNED
+            ))
+
+    with orm.orm_session() as session:
+        for orm_cls, rows in\
+        (
+            (orm.users.User, user_rows),
+            (orm.users.UserContact, contact_rows),
+            (orm.users.UserSession, session_rows),
+            (orm.tickets.ServiceTicket, ticket_rows)
+        ):
+            if rows:
+                session.execute(insert(orm_cls), rows)
+        session.commit()
+    models.rebuild_ticket_counts()
+
+    # One User with its whole graph, left loaded
+    # once detached for the translation benchmarks.
+    with orm.orm_session() as session:
+        user = session.scalars(models.USER_FULL_PLAN.apply(select(orm.users.User))).first()
+    return Fixture\
+    (
+        usernames=[row["username"] for row in contact_rows],
+        tokens=[token.decode() if isinstance(token, bytes) else token for token in tokens],
+        user=user,
+        user_model=txllayer.translate(user, trusted=True)
+    )
+
+
+def _percentile(ordered: list[int], q: float):
+    """Nearest rank percentile, in microseconds."""
+
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index] / 1000
+
+
+async def _call(op, arg):
+    result = op(arg)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def measure(
+        name: str,
+        op: typing.Callable[[typing.Any], typing.Any],
+        *,
+        prepare: typing.Callable[[int], typing.Any] = lambda n: n,
+        cleanup: typing.Callable[[typing.Any], typing.Any] | None = None,
+        iterations: int,
+        warmup: int,
+        allocations: int) -> Result:
+    """
+    Times `iterations` calls of `op`, after
+    `warmup` untimed ones. `prepare` makes the
+    argument of each call and `cleanup` undoes its
+    effects; neither is timed. Allocations are
+    measured over a separate pass so tracing does
+    not skew the timings.
+    """
+
+    async def run(n: int):
+        arg = prepare(n)
+        start = time.perf_counter_ns()
+        result = await _call(op, arg)
+        elapsed = time.perf_counter_ns() - start
+        if cleanup:
+            await _call(cleanup, result)
+        return elapsed
+
+    for n in range(warmup):
+        await run(n)
+
+    timings = sorted([await run(warmup + n) for n in range(iterations)])
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    peaks = 0
+    tracemalloc.start()
+    for n in range(allocations):
+        arg = prepare(warmup + iterations + n)
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        result = await _call(op, arg)
+        peaks += tracemalloc.get_traced_memory()[1] - current
+        if cleanup:
+            await _call(cleanup, result)
+    tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+
+    total = sum(timings) / 1e9
+    return Result\
+    (
+        name=name,
+        iterations=iterations,
+        p50_us=_percentile(timings, 50),
+        p95_us=_percentile(timings, 95),
+        p99_us=_percentile(timings, 99),
+        mean_us=total / iterations * 1e6,
+        ops_per_second=(iterations / total if total else 0.0),
+        peak_bytes=(peaks / allocations if allocations else 0.0),
+        retained_blocks=(retained / allocations if allocations else 0.0)
+    )
+
+
+def operations(client: ASGIClient, fixture: Fixture):
+    """
+    The benchmarked operations, by name, as keyword
+    arguments of `measure`.
+    """
+
+    usernames, tokens = fixture.usernames, fixture.tokens
+
+    async def expect_ok(response):
+        status, body = await response
+        if status != 200:
+            raise RuntimeError(f"unexpected response {status}: {body[:200]!r}")
+        return body
+
+    def login(username: str):
+        form = dict(username=username, password=BENCH_PASSWORD)
+        return expect_ok(client.request("POST", "/token", form=form))
+
+    def logout(body: bytes):
+        # Sessions are capped per user, so each login
+        # is ended before that user logs in again.
+        token = json.loads(body)["access_token"]
+        return models.async_revoke_session(oauth.decode_token(token))
+
+    def current_user(token: str):
+        headers = dict(authorization=f"Bearer {token}")
+        return expect_ok(client.request("GET", "/users/me", headers=headers))
+
+    def uncached(n: int):
+        models.users.session_cache.clear()
+        return tokens[n % len(tokens)]
+
+    def user_dict(n: int):
+        return models.consume_pyd_object(fixture.user_model)
+
+    return\
+    {
+        "login": dict\
+        (
+            op=login,
+            prepare=lambda n: usernames[n % len(usernames)],
+            cleanup=logout
+        ),
+        "current_user": dict\
+        (
+            op=current_user,
+            prepare=lambda n: tokens[n % len(tokens)]
+        ),
+        "current_user_uncached": dict\
+        (
+            op=current_user,
+            prepare=uncached
+        ),
+        "translate": dict\
+        (
+            op=lambda user: txllayer.translate(user),
+            prepare=lambda n: fixture.user
+        ),
+        "translate_trusted": dict\
+        (
+            op=lambda user: txllayer.translate(user, trusted=True),
+            prepare=lambda n: fixture.user
+        ),
+        "consume_pyd_object": dict\
+        (
+            op=models.consume_pyd_object,
+            prepare=lambda n: fixture.user_model
+        ),
+        "sanitize_dict": dict\
+        (
+            op=lambda mapping: common.sanitize_dict(mapping, SANITIZED_FIELDS),
+            prepare=user_dict
+        ),
+    }
+
+
+OPERATIONS =\
+(
+    "login",
+    "current_user",
+    "current_user_uncached",
+    "translate",
+    "translate_trusted",
+    "consume_pyd_object",
+    "sanitize_dict"
+)
+
+
+async def run(
+        *,
+        users: int = 100,
+        sessions: int = 2,
+        tickets: int = 10,
+        iterations: int = 1000,
+        warmup: int = 50,
+        allocations: int = 100,
+        only: typing.Iterable[str] = ()) -> list[Result]:
+    """
+    Seeds the database, then measures each of the
+    operations in `only`, all of them by default.
+    """
+
+    # Leave room for the benchmarked logins.
+    sessions = max(1, min(sessions, config.SECURITY_MAX_SESSIONS - 1))
+    fixture = seed(users, sessions, tickets)
+
+    await api_main.router.startup()
+    try:
+        ops = operations(ASGIClient(api_main), fixture)
+        return\
+        [
+            await measure\
+            (
+                name,
+                iterations=iterations,
+                warmup=warmup,
+                allocations=allocations,
+                **ops[name]
+            )
+            for name in (only or OPERATIONS)
+        ]
+    finally:
+        await api_main.router.shutdown()
+
+
+def compare(results: list[Result], baseline: dict[str, dict[str, float]], threshold: float):
+    """
+    Relative change of each percentile against
+    `baseline`, and the names of the operations
+    whose p50 or p95 regressed past `threshold`
+    percent.
+    """
+
+    changes, regressions = {}, []
+    for result in results:
+        before = baseline.get(result.name)
+        if not before:
+            continue
+
+        changes[result.name] =\
+        {
+            key: (getattr(result, key) - before[key]) / before[key] * 100
+            for key in ("p50_us", "p95_us", "p99_us")
+            if before.get(key)
+        }
+        if any(changes[result.name].get(key, 0) > threshold for key in ("p50_us", "p95_us")):
+            regressions.append(result.name)
+    return changes, regressions
+
+
+def dump_results(results: list[Result]):
+    """Results as a JSON baseline."""
+
+    return json.dumps({r.name: dataclasses.asdict(r) for r in results}, indent=2)
+
+
+def format_results(results: list[Result], changes: dict[str, dict[str, float]] | None = None):
+    """Results as a table, one operation per line."""
+
+    changes = changes or {}
+    lines =\
+    [
+        f"{'operation':<24}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}"
+        f"{'ops/s':>12}{'peak B':>10}{'kept':>8}"
+    ]
+    for r in results:
+        line =\
+        (
+            f"{r.name:<24}{r.p50_us:>10.1f}{r.p95_us:>10.1f}{r.p99_us:>10.1f}"
+            f"{r.ops_per_second:>12.0f}{r.peak_bytes:>10.0f}{r.retained_blocks:>8.1f}"
+        )
+        if change := changes.get(r.name):
+            line += "  " + " ".join(f"{k[:3]} {v:+.1f}%" for k, v in change.items())
+        lines.append(line)
+    return "\n".join(lines)
@@ -34,5 +34,273 @@ def start(*, host: str, port: str, reload: bool):
     uvicorn.run("api:api_main", host=host, port=port, reload=reload)
 
 
+@main_cli.command()
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Write to this file instead of stdout.",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=1000,
+    help="Tickets fetched per round trip.",
+    show_default=True,
+)
+def export(*, output, batch_size: int):
+    """Exports tickets and messages as NDJSON."""
+
+    # Imported here so the database is only
+    # connected to by the commands needing it.
+    import models
+
+    for chunk in models.export_tickets(batch_size):
+        output.write(chunk)
+
+
+@main_cli.command("import")
+@click.argument("source", type=click.File("r"))
+@click.option(
+    "--kind",
+    type=click.Choice(["tickets", "messages"]),
+    default="tickets",
+    help="Kind of the records being imported.",
+    show_default=True,
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "ndjson", "yaml"]),
+    default=None,
+    help="Format of SOURCE. Guessed from its extension if omitted.",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=1000,
+    help="Records validated and written per transaction.",
+    show_default=True,
+)
+def import_(*, source, kind: str, fmt: str | None, chunk_size: int):
+    """Bulk imports tickets or messages."""
+
+    import models
+
+    if not fmt:
+        fmt = source.name.rsplit(".", 1)[-1].lower()
+        fmt = {"jsonl": "ndjson", "yml": "yaml"}.get(fmt, fmt)
+
+    try:
+        records = models.read_records(source, fmt)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--format")
+    report = models.ingest_records(records, kind, chunk_size=chunk_size)
+
+    for error in report.errors:
+        where = f"row {error.row}" if error.row is not None else "all rows"
+        click.echo(f"chunk {error.chunk}, {where}: {error.detail}", err=True)
+    click.echo\
+    (
+        f"imported {report.inserted}/{report.rows} {kind} in "
+        f"{report.seconds:.2f}s ({report.rows_per_second:.0f} rows/s)"
+    )
+
+
+@main_cli.command()
+@click.option(
+    "--users",
+    type=int,
+    default=100,
+    help="Users seeded.",
+    show_default=True,
+)
+@click.option(
+    "--sessions",
+    type=int,
+    default=2,
+    help="Sessions seeded per user.",
+    show_default=True,
+)
+@click.option(
+    "--tickets",
+    type=int,
+    default=10,
+    help="Tickets seeded per user.",
+    show_default=True,
+)
+@click.option(
+    "--iterations",
+    type=int,
+    default=1000,
+    help="Timed calls per operation.",
+    show_default=True,
+)
+@click.option(
+    "--warmup",
+    type=int,
+    default=50,
+    help="Untimed calls made first per operation.",
+    show_default=True,
+)
+@click.option(
+    "--allocations",
+    type=int,
+    default=100,
+    help="Calls traced for allocations per operation.",
+    show_default=True,
+)
+@click.option(
+    "--only",
+    multiple=True,
+    help="Only run this operation. May be repeated.",
+)
+@click.option(
+    "--baseline",
+    type=click.File("r"),
+    default=None,
+    help="Compare against results saved by --save.",
+)
+@click.option(
+    "--save",
+    type=click.File("w"),
+    default=None,
+    help="Save the results as a JSON baseline.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=10.0,
+    help="Percent slowdown of p50 or p95 counted as a regression.",
+    show_default=True,
+)
+def bench(*, baseline, save, threshold: float, **options):
+    """Benchmarks the auth and translation hot paths."""
+
+    import asyncio, json, os
+
+    # Always against a throwaway in memory SQLite
+    # database, whatever the environment says.
+    os.environ["COMPASS_DEVELOPMENT_MODE"] = "basic"
+    os.environ["COMPASS_ORM_DATABASE"] = ""
+
+    import bench
+
+    unknown = set(options["only"]).difference(bench.OPERATIONS)
+    if unknown:
+        raise click.BadParameter(f"unknown operations {sorted(unknown)}", param_hint="--only")
+
+    results = asyncio.run(bench.run(**options))
+    changes, regressions = bench.compare(results, json.load(baseline), threshold)\
+        if baseline else ({}, [])
+
+    click.echo(bench.format_results(results, changes))
+    if save:
+        save.write(bench.dump_results(results))
+    if regressions:
+        click.echo(f"regressed past {threshold}%: {', '.join(regressions)}", err=True)
+        exit(1)
+
+
+@main_cli.command()
+@click.option(
+    "--url",
+    type=str,
+    default="http://127.0.0.1:8000",
+    help="Base URL of the running API.",
+    show_default=True,
+)
+@click.option(
+    "--token",
+    type=str,
+    envvar="COMPASS_TOKEN",
+    required=True,
+    help="Access token of an administrator.",
+)
+@click.option(
+    "--seconds",
+    type=float,
+    default=10.0,
+    help="Length of the capture, or its limit with --requests.",
+    show_default=True,
+)
+@click.option(
+    "--requests",
+    type=int,
+    default=None,
+    help="End the capture once this many requests were served.",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["cprofile", "sample"]),
+    default="cprofile",
+    help="Profile the event loop, or sample every thread.",
+    show_default=True,
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["cumulative", "tottime", "calls"]),
+    default="cumulative",
+    help="Order of cprofile stats.",
+    show_default=True,
+)
+@click.option(
+    "--memory",
+    is_flag=True,
+    default=False,
+    help="Diff memory allocations instead of profiling.",
+)
+@click.option(
+    "--group-by",
+    type=click.Choice(["lineno", "filename", "traceback"]),
+    default="lineno",
+    help="Grouping of memory diffs.",
+    show_default=True,
+)
+@click.option(
+    "--limit",
+    type=int,
+    default=None,
+    help="Entries reported.",
+)
+def profile(*, url: str, token: str, seconds: float, memory: bool, **options):
+    """Profiles a worker of a running API."""
+
+    import urllib.error, urllib.parse, urllib.request
+
+    if memory:
+        path = "/debug/memory"
+        params = dict(group_by=options["group_by"])
+    else:
+        path = "/debug/profile"
+        params = dict(mode=options["mode"], sort=options["sort"])
+    params.update(seconds=seconds, requests=options["requests"], limit=options["limit"])
+    query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+
+    request = urllib.request.Request\
+    (
+        f"{url.rstrip('/')}{path}?{query}",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=seconds + 30) as response:
+            click.echo(response.read().decode())
+    except urllib.error.HTTPError as error:
+        click.echo(f"{error.code}: {error.read().decode()}", err=True)
+        exit(1)
+
+
+@main_cli.command("rebuild-counts")
+def rebuild_counts():
+    """Recounts tickets by owner, kind and status."""
+
+    import models
+
+    click.echo(f"stored {models.rebuild_ticket_counts()} ticket counts")
+
+
+main = main_cli
+
+
 if __name__ == "__main__":
     exit(main_cli())
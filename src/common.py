@@ -1,4 +1,4 @@
-import base64, datetime, secrets, sys, uuid
+import base64, binascii, datetime, hashlib, hmac, secrets, sys, time, uuid
 import typing
 
 from datetime import datetime as datetime_t # This is proxied from here.
@@ -8,6 +8,14 @@ HashAlgorithm = typing.Callable[[str | bytes], bytes]
 HashPackage = typing.Iterable[HashAlgorithm]
 
 
+class SessionClaims(typing.NamedTuple):
+    """Values carried by a signed session token."""
+
+    owner_id: uuid.UUID
+    session_id: bytes
+    expires_on: int
+
+
 def basic_password_hash(password: str | bytes) -> bytes:
     if isinstance(password, bytes):
         return password
@@ -20,12 +28,27 @@ def current_timestamp():
     return datetime.datetime.now()
 
 
+def decode_cursor(cursor: str) -> list[str]:
+    """Unpack the values of a pagination cursor."""
+
+    return base64.urlsafe_b64decode(cursor.encode()).decode().split("\x1f")
+
+
 def decode_token(token: str):
     """Make token consumable by the ORM."""
 
     return base64.urlsafe_b64decode(token)
 
 
+def encode_cursor(*values: str) -> str:
+    """
+    Pack values into an opaque pagination cursor
+    consumable by the user.
+    """
+
+    return base64.urlsafe_b64encode("\x1f".join(values).encode()).decode()
+
+
 def encode_token(token: bytes):
     """Make token consumable by the user."""
 
@@ -70,6 +93,68 @@ def new_session_token(_uuid: uuid.UUID | None = None):
     return token
 
 
+def is_signed_token(token: str | bytes):
+    """
+    Whether the token is in the signed format.
+    Plain tokens are urlsafe base64 and never
+    contain a '.'.
+    """
+
+    return (b"." if isinstance(token, bytes) else ".") in token
+
+
+def sign_session_token(
+        owner_id: uuid.UUID,
+        session_id: bytes,
+        expires_on: datetime.datetime,
+        key: bytes):
+    """
+    Make a token, consumable by the user, which
+    can be verified without a session lookup.
+    """
+
+    payload = b".".join\
+    (
+        [
+            owner_id.hex.encode(),
+            base64.urlsafe_b64encode(session_id),
+            str(int(expires_on.timestamp())).encode()
+        ]
+    )
+    signature = hmac.digest(key, payload, hashlib.sha256)
+    return b".".join([payload, base64.urlsafe_b64encode(signature)])
+
+
+def verify_session_token(token: str | bytes, key: bytes):
+    """
+    Verify a token made by `sign_session_token`.
+    Returns `None` if the token was tampered with
+    or is expired.
+    """
+
+    if isinstance(token, str):
+        token = token.encode()
+
+    payload, _, signature = token.rpartition(b".")
+    try:
+        signature = base64.urlsafe_b64decode(signature)
+        owner_hex, session_id, expires_on = payload.split(b".")
+        if not hmac.compare_digest(signature, hmac.digest(key, payload, hashlib.sha256)):
+            return None
+        claims = SessionClaims\
+        (
+            uuid.UUID(owner_hex.decode()),
+            base64.urlsafe_b64decode(session_id),
+            int(expires_on)
+        )
+    except (binascii.Error, ValueError):
+        return None
+
+    if claims.expires_on <= time.time():
+        return None
+    return claims
+
+
 def new_uuid():
     """
     Generates a new UUID for an object or model.
@@ -40,8 +40,41 @@ DEVELOPMENT_MODE =\
     DevMode[os.getenv("COMPASS_DEVELOPMENT_MODE", "DISABLED").upper()]
 
 SECURITY_PASSWORD_HASHES = ()
+# Password hashing runs in a worker pool, either
+# "thread" or "process", of HASH_WORKERS workers
+# (0 picks a default). At most HASH_CONCURRENCY
+# hashes run at once; once HASH_QUEUE_LIMIT more
+# are waiting, logins are turned away (0 never
+# turns them away).
+SECURITY_HASH_EXECUTOR = os.getenv("COMPASS_HASH_EXECUTOR", "thread").lower()
+SECURITY_HASH_WORKERS = int(os.getenv("COMPASS_HASH_WORKERS", 0)) or None
+SECURITY_HASH_CONCURRENCY = int(os.getenv("COMPASS_HASH_CONCURRENCY", 4))
+SECURITY_HASH_QUEUE_LIMIT = int(os.getenv("COMPASS_HASH_QUEUE_LIMIT", 64))
 SECURITY_SESSION_TTL = {"minutes": 30}
 SECURITY_MAX_SESSIONS = common.unsigned(5)
+# Number of authenticated sessions held in memory.
+# Entries never outlive SECURITY_SESSION_TTL or the
+# session itself. A size of 0 disables the cache.
+SECURITY_SESSION_CACHE_SIZE =\
+    common.unsigned(int(os.getenv("COMPASS_SESSION_CACHE_SIZE", 1024)))
+# Signing key for self-validating session tokens.
+# When unset, tokens are plain session ids which
+# must be looked up unless cached. Sessions ended
+# by another worker are refreshed from the
+# database every SECURITY_REVOCATION_REFRESH
+# seconds, and rejected from then on whether the
+# token is signed or cached.
+SECURITY_TOKEN_KEY = os.getenv("COMPASS_TOKEN_KEY", "").encode() or None
+SECURITY_REVOCATION_REFRESH =\
+    float(os.getenv("COMPASS_REVOCATION_REFRESH", 30.0))
+# Expired sessions are swept every
+# SESSION_SWEEP_INTERVAL seconds (0 disables the
+# sweeper), deleting SESSION_SWEEP_BATCH rows per
+# transaction.
+SECURITY_SESSION_SWEEP_INTERVAL =\
+    float(os.getenv("COMPASS_SESSION_SWEEP_INTERVAL", 300.0))
+SECURITY_SESSION_SWEEP_BATCH =\
+    int(os.getenv("COMPASS_SESSION_SWEEP_BATCH", 500))
 
 # Application specific constants. These are not
 # meant to change at runtime in prodution.
@@ -58,5 +91,57 @@ ORM_PASSWORD = os.getenv("COMPASS_ORM_PASSWORD", None)
 ORM_HOSTNAME = os.getenv("COMPASS_ORM_HOSTNAME", None)
 ORM_DATABASE = os.getenv("COMPASS_ORM_DATABASE", None)
 
+# Connection pool settings. RECYCLE and TIMEOUT
+# are in seconds; a RECYCLE of -1 never recycles
+# pooled connections.
+ORM_POOL_SIZE = int(os.getenv("COMPASS_ORM_POOL_SIZE", 5))
+ORM_POOL_OVERFLOW = int(os.getenv("COMPASS_ORM_POOL_OVERFLOW", 10))
+ORM_POOL_RECYCLE = int(os.getenv("COMPASS_ORM_POOL_RECYCLE", -1))
+ORM_POOL_PRE_PING =\
+    os.getenv("COMPASS_ORM_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+ORM_POOL_TIMEOUT = float(os.getenv("COMPASS_ORM_POOL_TIMEOUT", 30.0))
+
+# Change events are carried between workers by
+# EVENTS_BROKER, either "memory" (this process
+# only) or "postgres" (LISTEN/NOTIFY). Each
+# subscriber buffers up to EVENTS_QUEUE_SIZE
+# events and is dropped once it falls further
+# behind. Idle streams are kept alive every
+# EVENTS_KEEPALIVE seconds.
+EVENTS_BROKER = os.getenv\
+(
+    "COMPASS_EVENTS_BROKER",
+    "memory" if DEVELOPMENT_MODE in DEV_BASIC | DEV_DEBUG else "postgres"
+).lower()
+EVENTS_QUEUE_SIZE = int(os.getenv("COMPASS_EVENTS_QUEUE_SIZE", 100))
+EVENTS_KEEPALIVE = float(os.getenv("COMPASS_EVENTS_KEEPALIVE", 15.0))
+
+# Request timings and query counts are recorded
+# and served on /metrics, in the Prometheus text
+# format, when METRICS_ENABLED. /metrics is not
+# authenticated and lists every route and its
+# traffic, so it is off unless asked for and the
+# route should only be reachable by the scraper.
+# Disabled, no instrumentation is installed.
+METRICS_ENABLED =\
+    os.getenv("COMPASS_METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Admins may profile a running worker through
+# the /debug endpoints when PROFILING_ENABLED, by
+# default only in development mode. Captures last
+# PROFILING_MAX_SECONDS at most.
+PROFILING_ENABLED = os.getenv\
+(
+    "COMPASS_PROFILING_ENABLED",
+    "true" if DEVELOPMENT_MODE in DEV_BASIC | DEV_DEBUG else "false"
+).lower() in ("1", "true", "yes")
+PROFILING_MAX_SECONDS = float(os.getenv("COMPASS_PROFILING_MAX_SECONDS", 300.0))
+
 # Logging related settings
 LOGGING_CONFIG = os.getenv("COMPASS_LOG_CONFIG", None)
+# Share of calls to `debugger.debug` wrapped
+# functions that get logged, from 0 to 1; calls
+# which fail are always logged. Logged values are
+# cut to DEBUG_REPR_LIMIT characters.
+DEBUG_SAMPLE_RATE = float(os.getenv("COMPASS_DEBUG_SAMPLE_RATE", 1.0))
+DEBUG_REPR_LIMIT = int(os.getenv("COMPASS_DEBUG_REPR_LIMIT", 500))
@@ -1,33 +1,136 @@
-import functools, logging, pprint
+import functools, logging, random, reprlib, time, typing
+
+import pydantic
 
 import config
 
 
-def debug(fn):
+class ShortRepr(reprlib.Repr):
+    """
+    Size bounded repr. Containers and Pydantic
+    models are cut short while being formatted,
+    rather than formatted in full and trimmed.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit     = limit
+        self.maxlevel  = 3
+        self.maxdict   = 8
+        self.maxlist   = 8
+        self.maxtuple  = 8
+        self.maxset    = 8
+        self.maxstring = 80
+        self.maxother  = 80
+
+    def repr(self, x: typing.Any):
+        text = super().repr(x)
+        if len(text) > self.limit:
+            text = text[:self.limit - 3] + "..."
+        return text
+
+    def repr1(self, x: typing.Any, level: int):
+        if isinstance(x, pydantic.BaseModel):
+            return self.repr_model(x, level)
+        return super().repr1(x, level)
+
+    def repr_model(self, x: pydantic.BaseModel, level: int):
+        name = type(x).__name__
+        if level <= 0:
+            return f"{name}(...)"
+
+        items = list(x.__dict__.items())
+        fields = [f"{k}={self.repr1(v, level - 1)}" for k, v in items[:self.maxdict]]
+        if len(items) > self.maxdict:
+            fields.append("...")
+        return f"{name}({', '.join(fields)})"
+
+
+class Lazy:
+    """
+    Formats `fn(*args)` only once a log record is
+    rendered, so nothing is formatted for records
+    which are never emitted.
+    """
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: typing.Callable[..., str], *args):
+        self.fn   = fn
+        self.args = args
+
+    def __str__(self):
+        return self.fn(*self.args)
+
+
+def debug(
+        fn: typing.Callable | None = None,
+        *,
+        level: int = logging.INFO,
+        sample_rate: float | None = None,
+        repr_limit: int | None = None):
     """
     Wraps some function with a logger. Reraises
     exceptions with additional information.
+
+    Only `sample_rate` of calls are logged, along
+    with their wall and CPU time, and only while
+    `level` is enabled. Failed calls are always
+    logged. Can be applied bare or with options.
     """
 
+    if fn is None:
+        return functools.partial\
+        (
+            debug,
+            level=level,
+            sample_rate=sample_rate,
+            repr_limit=repr_limit
+        )
+
+    if config.DEVELOPMENT_MODE not in config.DEV_BASIC | config.DEV_DEBUG:
+        return fn
+
     logger = logging.getLogger("uvicorn.error")
+    fn_name = fn.__qualname__
+    rate = config.DEBUG_SAMPLE_RATE if sample_rate is None else sample_rate
+    short_repr = ShortRepr(config.DEBUG_REPR_LIMIT if repr_limit is None else repr_limit).repr
 
     @functools.wraps(fn)
     def inner(*args, **kwds):
-        fn_name = fn.__qualname__
+        sampled = logger.isEnabledFor(level) and (rate >= 1 or random.random() < rate)
         try:
-            logger.info(f"{fn_name} callargs: {args=} {kwds=}")
+            if not sampled:
+                return fn(*args, **kwds)
+
+            logger.log\
+            (
+                level,
+                "%s callargs: args=%s kwds=%s",
+                fn_name,
+                Lazy(short_repr, args),
+                Lazy(short_repr, kwds)
+            )
+            wall, cpu = time.perf_counter(), time.thread_time()
             rt = fn(*args, **kwds)
-            logger.info(f"{fn_name} RT value: {pprint.pformat(rt)}")
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            logger.log\
+            (
+                level,
+                "%s RT value: %s (wall=%.3fms cpu=%.3fms)",
+                fn_name,
+                Lazy(short_repr, rt),
+                wall * 1000,
+                cpu * 1000
+            )
         except Exception as e:
-            logger.error(f"{fn_name} failed with args: {args}")
-            logger.error(f"{fn_name} failed with kwds: {kwds}")
+            logger.error("%s failed with args: %s", fn_name, Lazy(short_repr, args))
+            logger.error("%s failed with kwds: %s", fn_name, Lazy(short_repr, kwds))
             raise DebugError(f"failed with exception:", str(e), error=e)
 
         return rt
 
-    if config.DEVELOPMENT_MODE in config.DEV_BASIC | config.DEV_DEBUG:
-        return inner
-    return fn
+    return inner
 
 
 class DebugError(Exception):
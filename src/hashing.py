@@ -0,0 +1,102 @@
+"""
+Password hashing off the event loop. The hash
+chain runs in a bounded worker pool so slow key
+derivation functions cannot stall every other
+request while a login is processed.
+"""
+
+import asyncio, concurrent.futures
+
+import common, config
+
+_executor: concurrent.futures.Executor | None = None
+_limiter: asyncio.Semaphore | None = None
+
+# Hashes waiting for a free slot and hashes being
+# computed, respectively.
+queue_depth = 0
+running = 0
+rejected = 0
+
+
+class HashQueueFull(Exception):
+    """Too many hashes are already waiting."""
+
+
+def executor():
+    """
+    Get the pool hashes are computed in, creating
+    it on first use.
+    """
+
+    global _executor
+
+    if _executor is None:
+        if config.SECURITY_HASH_EXECUTOR == "process":
+            pool_cls = concurrent.futures.ProcessPoolExecutor
+        else:
+            pool_cls = concurrent.futures.ThreadPoolExecutor #type: ignore[assignment]
+        _executor = pool_cls(max_workers=config.SECURITY_HASH_WORKERS)
+    return _executor
+
+
+def limiter():
+    """Get the semaphore bounding concurrent hashes."""
+
+    global _limiter
+
+    if _limiter is None:
+        _limiter = asyncio.Semaphore(config.SECURITY_HASH_CONCURRENCY)
+    return _limiter
+
+
+def shutdown():
+    """Stops the worker pool, if one was started."""
+
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def stats():
+    """Queue depth and throughput counters."""
+
+    return dict(queue_depth=queue_depth, running=running, rejected=rejected)
+
+
+async def rotate_password_hash(
+        password: str | bytes,
+        *hashes: common.HashAlgorithm) -> bytes:
+    """
+    Async counterpart of
+    `common.rotate_password_hash`. Runs the chain
+    in the worker pool unless there is nothing to
+    compute but the final encoding.
+    """
+
+    global queue_depth, running, rejected
+
+    if not hashes:
+        return common.rotate_password_hash(password)
+
+    limit = config.SECURITY_HASH_QUEUE_LIMIT
+    if limit and queue_depth >= limit:
+        rejected += 1
+        raise HashQueueFull(f"{queue_depth} password hashes already queued")
+
+    queue_depth += 1
+    try:
+        await limiter().acquire()
+    finally:
+        queue_depth -= 1
+
+    running += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor\
+            (executor(), common.rotate_password_hash, password, *hashes)
+    finally:
+        running -= 1
+        limiter().release()
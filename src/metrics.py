@@ -0,0 +1,217 @@
+"""
+Request and database instrumentation, exposed in
+the Prometheus text format. Nothing here is
+installed unless METRICS_ENABLED is set, so a
+disabled deployment pays nothing for it.
+
+Requests are timed by an ASGI middleware. Queries
+are timed by engine event hooks and attributed to
+the request running them through a context
+variable, so queries made in worker threads or
+async sessions count toward the right request.
+"""
+
+import bisect, contextvars, time, typing
+
+import sqlalchemy
+
+# Upper bounds of the latency buckets, in seconds,
+# and of the per request query count buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Observations counted in cumulative buckets,
+    one set per combination of labels.
+    """
+
+    name: str
+    help: str
+    buckets: tuple[float, ...]
+
+    def __init__(self, name: str, help: str, buckets: typing.Sequence[float]):
+        self.name    = name
+        self.help    = help
+        self.buckets = tuple(buckets)
+        self._series: dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        """Counts `value` under `labels`."""
+
+        series = self._series.get(labels)
+        if series is None:
+            # Bucket counts, then sum and count.
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def expose(self) -> typing.Iterator[str]:
+        """Lines of this histogram in text format."""
+
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(labels + (('le', repr(float(bound))),))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}"
+            yield f"{self.name}_sum{_labels(labels)} {total}"
+            yield f"{self.name}_count{_labels(labels)} {count}"
+
+
+def _labels(labels: Labels):
+    """Formats labels, escaped, for text format."""
+
+    if not labels:
+        return ""
+    escape = lambda v: v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+class RequestStats:
+    """Database use of the request in progress."""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries    = 0
+        self.db_seconds = 0.0
+
+
+request_stats: contextvars.ContextVar[RequestStats | None] =\
+    contextvars.ContextVar("request_stats", default=None)
+
+request_latency = Histogram\
+(
+    "compass_request_duration_seconds",
+    "Time taken to respond to requests.",
+    LATENCY_BUCKETS
+)
+request_queries = Histogram\
+(
+    "compass_request_queries",
+    "Database queries run per request.",
+    QUERY_BUCKETS
+)
+request_db_time = Histogram\
+(
+    "compass_request_db_duration_seconds",
+    "Time spent in the database per request.",
+    LATENCY_BUCKETS
+)
+
+# Queries made outside of any request, e.g. by
+# background tasks.
+background_queries = 0
+background_db_seconds = 0.0
+
+# Callables returning a mapping of numbers,
+# exposed as gauges under a prefix.
+collectors: dict[str, typing.Callable[[], typing.Mapping[str, float]]] = {}
+
+
+def register_collector(prefix: str, fn: typing.Callable[[], typing.Mapping[str, float]]):
+    """
+    Exposes each number `fn` returns as the gauge
+    `<prefix>_<key>` on every scrape.
+    """
+
+    collectors[prefix] = fn
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._compass_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global background_queries, background_db_seconds
+
+    elapsed = time.perf_counter() - context._compass_query_started
+    stats = request_stats.get()
+    if stats is None:
+        background_queries += 1
+        background_db_seconds += elapsed
+    else:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine: sqlalchemy.Engine):
+    """Times every query `engine` runs."""
+
+    sqlalchemy.event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    sqlalchemy.event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, query count and database
+    time of each HTTP request, by route template
+    so that path parameters do not multiply the
+    series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+
+            route = scope.get("route")
+            labels =\
+            (
+                ("method", scope["method"]),
+                ("route", getattr(route, "path", "<unmatched>")),
+                ("status", str(status))
+            )
+            request_latency.observe(elapsed, labels)
+            request_queries.observe(stats.queries, labels[:2])
+            request_db_time.observe(stats.db_seconds, labels[:2])
+
+
+def expose() -> str:
+    """Every metric in the Prometheus text format."""
+
+    lines = []
+    for histogram in (request_latency, request_queries, request_db_time):
+        lines.extend(histogram.expose())
+
+    lines.append("# HELP compass_background_queries_total Queries run outside of requests.")
+    lines.append("# TYPE compass_background_queries_total counter")
+    lines.append(f"compass_background_queries_total {background_queries}")
+    lines.append("# HELP compass_background_db_seconds_total Time spent in queries run outside of requests.")
+    lines.append("# TYPE compass_background_db_seconds_total counter")
+    lines.append(f"compass_background_db_seconds_total {background_db_seconds}")
+
+    for prefix, fn in collectors.items():
+        for key, value in fn().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            lines.append(f"# TYPE {prefix}_{key} gauge")
+            lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
@@ -7,11 +7,69 @@ used in `Compass`, their roles in the connected database and at
 runtime.
 """
 
-from txllayer import register_txl, retrieve_txl, translate
+from models.orm.enums import ENUM_LOOKUP, enum_member
+from models.txllayer import register_txl, retrieve_txl, translate, translate_many
+from models.txllayer import consume_orm_object, consume_pyd_object
+from models.aggregates import ticket_counts, async_ticket_counts, rebuild_ticket_counts
+from models.encoders import encode_json
+from models.events import listen_events, record_events, subscribe_events
+from models.ingest import INGEST_FORMATS, INGEST_KINDS, ingest_records, read_records
+from models.plans import LoadPlan
+from models.fulltext import SEARCH_SCOPES, async_search
+from models.tickets import TICKET_PLAN, TICKET_EXPORT_PLAN
+from models.tickets import export_tickets, async_export_tickets
+from models.tickets import async_list_tickets
+from models.tickets import async_get_ticket
+from models.tickets import async_accessible_tickets
+from models.tickets import async_claim_tickets
+from models.users import USER_AUTH_PLAN, USER_FULL_PLAN
+from models.users import async_do_user_lookup
+from models.users import async_validate_user_sessions
+from models.users import async_create_new_session
+from models.users import async_revoke_session
+from models.users import async_refresh_revoked_sessions
+from models.users import session_is_revoked
+from models.users import async_sweep_expired_sessions
 
 __all__ =\
 (
+    "ENUM_LOOKUP",
+    "enum_member",
     "register_txl",
     "retrieve_txl",
-    "translate"
+    "translate",
+    "translate_many",
+    "consume_orm_object",
+    "consume_pyd_object",
+    "ticket_counts",
+    "async_ticket_counts",
+    "rebuild_ticket_counts",
+    "encode_json",
+    "listen_events",
+    "record_events",
+    "subscribe_events",
+    "INGEST_FORMATS",
+    "INGEST_KINDS",
+    "ingest_records",
+    "read_records",
+    "LoadPlan",
+    "SEARCH_SCOPES",
+    "async_search",
+    "TICKET_PLAN",
+    "TICKET_EXPORT_PLAN",
+    "export_tickets",
+    "async_export_tickets",
+    "async_list_tickets",
+    "async_get_ticket",
+    "async_accessible_tickets",
+    "async_claim_tickets",
+    "USER_AUTH_PLAN",
+    "USER_FULL_PLAN",
+    "async_do_user_lookup",
+    "async_validate_user_sessions",
+    "async_create_new_session",
+    "async_revoke_session",
+    "async_refresh_revoked_sessions",
+    "session_is_revoked",
+    "async_sweep_expired_sessions"
 )
@@ -0,0 +1,204 @@
+"""
+Ticket counts by owner, kind and status, kept in
+`ticket_counts` so dashboards read a handful of
+rows rather than scanning `service_tickets`.
+
+Counts change in the same transaction as the
+tickets: ORM writes are counted as each session
+flushes, writes bypassing the ORM record their
+changes with `record_count`. Should the counts
+drift, e.g. after tickets are edited by hand,
+`rebuild_ticket_counts` recounts them.
+"""
+
+import collections
+
+from sqlalchemy import event, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+
+import common
+from models import orm, pyd
+from models.orm.engine import delete, insert, select
+from models.orm.enums import enum_member
+
+ServiceTicket = orm.tickets.ServiceTicket
+TicketCount = orm.tickets.TicketCount
+
+# session.info key holding the count changes of
+# the current transaction.
+_PENDING = "compass_ticket_counts"
+
+# Attributes a ticket is counted by.
+_COUNTED = ("owner_id", "kind", "status")
+
+
+def record_count(
+        session: Session,
+        owner_id: common.UUID_t,
+        kind: str,
+        status: str,
+        delta: int = 1):
+    """
+    Adds `delta` to the count of tickets `owner_id`
+    has of `kind` in `status` once `session`
+    commits.
+    """
+
+    pending = session.info.setdefault(_PENDING, collections.Counter())
+    pending[(owner_id, str(kind), str(status))] += delta
+
+
+def _committed(obj: ServiceTicket, name: str):
+    """Value of `name` as last flushed."""
+
+    history = attributes.get_history(obj, name)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, name)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_counts(session: Session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, ServiceTicket):
+            record_count(session, obj.owner_id, obj.kind, obj.status)
+
+    for obj in session.deleted:
+        if isinstance(obj, ServiceTicket):
+            record_count(session, *(_committed(obj, name) for name in _COUNTED), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, ServiceTicket):
+            continue
+        before = tuple(_committed(obj, name) for name in _COUNTED)
+        after = tuple(getattr(obj, name) for name in _COUNTED)
+        if before != after:
+            record_count(session, *before, -1)
+            record_count(session, *after, 1)
+
+
+def _apply_counts(session: Session, pending: collections.Counter):
+    """
+    Upserts the changed counts. Rows are written
+    in key order so concurrent transactions lock
+    them in the same order.
+    """
+
+    rows =\
+    [
+        dict(owner_id=owner_id, kind=kind, status=status, count=delta)
+        for (owner_id, kind, status), delta in sorted(pending.items())
+        if delta
+    ]
+    if not rows:
+        return
+
+    dialect = session.bind.dialect.name
+    stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(TicketCount)
+    stmt = stmt.on_conflict_do_update\
+    (
+        index_elements=[TicketCount.owner_id, TicketCount.kind, TicketCount.status],
+        set_=dict(count=TicketCount.count + stmt.excluded["count"])
+    )
+    session.execute(stmt, rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_counts(session: Session):
+    # Flushed first so that changes flushed by the
+    # commit itself are counted too.
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        _apply_counts(session, pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_counts(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def _counts_stmt(owner_id: common.UUID_t | None):
+    """
+    Selects the counts of one owner, or the sum
+    over every owner.
+    """
+
+    if owner_id:
+        return select(TicketCount.kind, TicketCount.status, TicketCount.count)\
+            .where(TicketCount.owner_id == owner_id)
+    return select(TicketCount.kind, TicketCount.status, func.sum(TicketCount.count))\
+        .group_by(TicketCount.kind, TicketCount.status)
+
+
+def _counts(owner_id: common.UUID_t | None, rows):
+    """
+    Arranges counts by kind then status, with
+    every combination present.
+    """
+
+    counts =\
+    {
+        kind: {status: 0 for status in pyd.tickets.TicketStatusEnum}
+        for kind in pyd.tickets.TicketKindEnum
+    }
+    for kind, status, count in rows:
+        kind = enum_member(pyd.tickets.TicketKindEnum, kind)
+        counts[kind][enum_member(pyd.tickets.TicketStatusEnum, status)] = count
+
+    return pyd.tickets.TicketCountsM.construct\
+    (
+        owner_id=owner_id,
+        counts=counts,
+        total=sum(sum(by_status.values()) for by_status in counts.values())
+    )
+
+
+def ticket_counts(owner_id: common.UUID_t | None = None) -> pyd.tickets.TicketCountsM:
+    """
+    Get ticket counts by kind and status for one
+    owner, or for everyone.
+    """
+
+    with orm.orm_session() as session:
+        return _counts(owner_id, session.execute(_counts_stmt(owner_id)).all())
+
+
+async def async_ticket_counts(owner_id: common.UUID_t | None = None) -> pyd.tickets.TicketCountsM:
+    """Async counterpart of `ticket_counts`."""
+
+    async with orm.async_orm_session() as session:
+        return _counts(owner_id, (await session.execute(_counts_stmt(owner_id))).all())
+
+
+def rebuild_ticket_counts() -> int:
+    """
+    Recounts every ticket, replacing the stored
+    counts. Returns the number of counts stored.
+    """
+
+    totals = select\
+        (
+            ServiceTicket.owner_id,
+            ServiceTicket.kind,
+            ServiceTicket.status,
+            func.count()
+        )\
+        .group_by(ServiceTicket.owner_id, ServiceTicket.kind, ServiceTicket.status)
+
+    with orm.orm_session() as session:
+        if session.bind.dialect.name == "postgresql":
+            # Writers update counts after their tickets,
+            # so holding this lock until commit means
+            # each is either part of the recount or
+            # applied on top of it, never both.
+            session.execute(text("LOCK TABLE ticket_counts IN SHARE ROW EXCLUSIVE MODE"))
+
+        session.execute(delete(TicketCount))
+        result = session.execute\
+            (insert(TicketCount).from_select(["owner_id", "kind", "status", "count"], totals))
+        session.commit()
+    return result.rowcount
@@ -0,0 +1,163 @@
+"""
+In-process caches used by the models layer to
+serve hot lookups without a database round trip.
+"""
+
+import asyncio, collections, functools, threading, typing
+
+import common
+
+K = typing.TypeVar("K", bound=typing.Hashable)
+V = typing.TypeVar("V")
+R = typing.TypeVar("R")
+
+
+class TTLCache(typing.Generic[K, V]):
+    """
+    Bounded mapping whose entries expire at a given
+    timestamp. Once `maxsize` is reached the least
+    recently used entry is evicted. Entries can be
+    tagged so related entries are invalidated
+    together. Safe to share between threads.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+
+        self._entries: collections.OrderedDict[K, tuple[common.datetime_t, V, typing.Hashable]] =\
+            collections.OrderedDict()
+        self._tags: dict[typing.Hashable, set[K]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: K):
+        return self.get(key, count=False) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: K, default: V | None = None, *, count: bool = True):
+        """
+        Get the value stored at `key` if it has not
+        yet expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > common.current_timestamp():
+                self._entries.move_to_end(key)
+                self.hits += count
+                return entry[1]
+
+            if entry:
+                self._pop(key)
+            self.misses += count
+            return default
+
+    def set(
+            self,
+            key: K,
+            value: V,
+            expires_on: common.datetime_t,
+            *,
+            tag: typing.Hashable | None = None):
+        """
+        Stores `value` at `key` until `expires_on`.
+        """
+
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (expires_on, value, tag)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                self._pop(next(iter(self._entries)))
+
+    def pop(self, key: K):
+        """Removes the entry stored at `key`."""
+
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: K):
+        entry = self._entries.pop(key, None)
+        if not entry or entry[2] is None:
+            return
+
+        keys = self._tags.get(entry[2], set())
+        keys.discard(key)
+        if not keys:
+            self._tags.pop(entry[2], None)
+
+    def invalidate(self, tag: typing.Hashable):
+        """Removes all entries stored with `tag`."""
+
+        with self._lock:
+            for key in tuple(self._tags.get(tag, ())):
+                self._pop(key)
+
+    def clear(self):
+        """Removes all entries."""
+
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        """Hit and miss counters of this cache."""
+
+        return dict(size=len(self), hits=self.hits, misses=self.misses)
+
+
+class SingleFlight(typing.Generic[K]):
+    """
+    Coalesces concurrent calls made with the same
+    key: the first runs, the others wait on and
+    share its result, or its exception. Nothing is
+    kept once the call completes.
+    """
+
+    calls: int
+    coalesced: int
+
+    def __init__(self):
+        self.calls     = 0
+        self.coalesced = 0
+
+        self._async_flights: dict[K, asyncio.Task] = {}
+
+    async def async_do(self, key: K, fn: typing.Callable[[], typing.Awaitable[R]]) -> R:
+        """
+        Awaits `fn` unless a call for `key` is
+        already in flight on this loop. The call
+        runs as its own task, so a caller being
+        cancelled does not cancel the others.
+        """
+
+        self.calls += 1
+        task = self._async_flights.get(key)
+        if task is None:
+            task = self._async_flights[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(functools.partial(self._landed, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _landed(self, key: K, task: asyncio.Task):
+        if self._async_flights.get(key) is task:
+            del self._async_flights[key]
+
+    def stats(self):
+        """Call and coalesced call counters."""
+
+        in_flight = len(self._async_flights)
+        return dict(calls=self.calls, coalesced=self.coalesced, in_flight=in_flight)
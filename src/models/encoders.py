@@ -0,0 +1,114 @@
+"""
+JSON encoding of Pydantic models in one pass.
+Each model gets an encoder, compiled on first use,
+which reads the values of its instances directly
+and converts UUID, datetime and bytes fields in
+place; the C encoder of `json` does the rest.
+
+The output matches what FastAPI would produce
+through `jsonable_encoder`, without first copying
+the model into a dict and walking that again.
+"""
+
+import datetime, decimal, enum, json, typing, uuid
+
+import pydantic.fields
+import pydantic.json
+
+from models import bases
+
+# Conversions of values the json module cannot
+# encode itself, as jsonable_encoder does them.
+CONVERTERS: dict[type, typing.Callable[[typing.Any], typing.Any]] =\
+{
+    uuid.UUID: str,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    bytes: bytes.decode,
+    decimal.Decimal: float,
+    set: list,
+    frozenset: list,
+}
+
+
+class ModelEncoder:
+    """
+    Converts instances of `pyd_cls` into mappings
+    of their set fields, by alias.
+    """
+
+    pyd_cls: type[bases.PYDBase]
+    fields: list[tuple[str, str, type | None]]
+
+    def __init__(self, pyd_cls: type[bases.PYDBase]):
+        self.pyd_cls = pyd_cls
+        self.fields  =\
+        [
+            (name, field.alias, _converted_type(field))
+            for name, field in pyd_cls.__fields__.items()
+        ]
+
+    def __call__(self, obj: bases.PYDBase) -> dict[str, typing.Any]:
+        # Values are read from the instance itself;
+        # fields left out of a trusted construct()
+        # are left out of the output as well.
+        values = obj.__dict__
+        encoded = {}
+        for name, alias, kind in self.fields:
+            if name not in values:
+                continue
+            value = values[name]
+            encoded[alias] = CONVERTERS[kind](value) if type(value) is kind else value
+        return encoded
+
+
+def _converted_type(field: pydantic.fields.ModelField):
+    """
+    Type of a field converted up front, if it is
+    known to need converting. Values of any other
+    type are left to `_encode_default`.
+    """
+
+    if field.shape != pydantic.fields.SHAPE_SINGLETON:
+        return None
+    return field.type_ if field.type_ in CONVERTERS else None
+
+
+compiled_encoders: dict[type[bases.PYDBase], ModelEncoder] = {}
+
+
+def compile_encoder(pyd_cls: type[bases.PYDBase]) -> ModelEncoder:
+    """Get the encoder of `pyd_cls`."""
+
+    if pyd_cls not in compiled_encoders:
+        compiled_encoders[pyd_cls] = ModelEncoder(pyd_cls)
+    return compiled_encoders[pyd_cls]
+
+
+def _encode_default(obj: typing.Any):
+    """Encodes what the json module cannot."""
+
+    if isinstance(obj, bases.PYDBase):
+        return compile_encoder(type(obj))(obj)
+    if convert := CONVERTERS.get(type(obj)):
+        return convert(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    return pydantic.json.pydantic_encoder(obj)
+
+
+def encode_json(content: typing.Any) -> bytes:
+    """
+    Encodes `content`, which may hold models, as
+    compact UTF-8 JSON.
+    """
+
+    return json.dumps\
+    (
+        content,
+        default=_encode_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
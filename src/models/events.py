@@ -0,0 +1,332 @@
+"""
+Change events for tickets and messages. Events
+are collected from each session as it flushes
+and published once it commits, through a broker
+shared by every worker, to the subscribers of
+this process.
+
+Subscribers follow topics: `ticket:<id>` for a
+ticket and its messages, `owner:<id>` for what
+a user owns. Events published while a worker is
+disconnected from the broker are not replayed;
+subscribers should refetch after reconnecting.
+"""
+
+import asyncio, contextlib, logging, typing
+
+import sqlalchemy
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+import common, config
+from models import bases, orm, pyd, txllayer
+
+ChangeEventM = pyd.events.ChangeEventM
+
+# Channel notified through Postgres.
+CHANNEL = "compass_events"
+
+# session.info key holding the events of the
+# current transaction.
+_PENDING = "compass_events"
+
+ACTION_CREATED = "created"
+ACTION_UPDATED = "updated"
+ACTION_DELETED = "deleted"
+
+
+def change_event(obj: bases.ORMBase, action: str) -> ChangeEventM:
+    """Describes a change made to `obj`."""
+
+    model = txllayer.translate(obj, trusted=True)
+    if isinstance(obj, orm.tickets.ServiceTicket):
+        return ChangeEventM.construct\
+            (action=action, ticket_id=obj.id, owner_id=obj.owner_id, ticket=model)
+    return ChangeEventM.construct\
+        (action=action, ticket_id=obj.ticket_id, owner_id=obj.owner_id, message=model)
+
+
+def inserted_events(model: type[bases.PYDBase], rows: typing.Iterable[dict[str, typing.Any]]):
+    """Describes rows inserted past the ORM."""
+
+    if model is pyd.tickets.ServiceTicketM:
+        return [
+            ChangeEventM.construct\
+            (
+                action=ACTION_CREATED,
+                ticket_id=row["id"],
+                owner_id=row["owner_id"],
+                ticket=model.construct(**row)
+            )
+            for row in rows]
+    return [
+        ChangeEventM.construct\
+        (
+            action=ACTION_CREATED,
+            ticket_id=row["ticket_id"],
+            owner_id=row["owner_id"],
+            message=model.construct(**row)
+        )
+        for row in rows]
+
+
+def event_topics(change: ChangeEventM):
+    """Topics on which `change` is published."""
+
+    return (f"ticket:{change.ticket_id.hex}", f"owner:{change.owner_id.hex}")
+
+
+class Subscription:
+    """
+    Events published to any of `topics`, buffered
+    up to `size`. A subscriber falling further
+    behind is dropped; `get` then returns None.
+    """
+
+    topics: frozenset[str]
+    dropped: bool
+
+    def __init__(self, topics: typing.Iterable[str], size: int):
+        self.topics  = frozenset(topics)
+        self.dropped = False
+        self._queue: asyncio.Queue[ChangeEventM | None] = asyncio.Queue(size)
+
+    def put(self, change: ChangeEventM):
+        """Buffers `change` for this subscriber."""
+
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> ChangeEventM | None:
+        """Waits for the next event."""
+
+        return await self._queue.get()
+
+
+class Hub:
+    """
+    Fans events out to the subscribers of this
+    process. Subscribers cost one queue each, so
+    idle ones are cheap to keep around.
+    """
+
+    delivered: int
+    dropped: int
+
+    def __init__(self):
+        self.delivered = 0
+        self.dropped   = 0
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._topics: dict[str, set[Subscription]] = {}
+
+    @contextlib.contextmanager
+    def subscribe(self, topics: typing.Iterable[str], size: int | None = None):
+        """Subscribes to `topics` for the duration."""
+
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
+        subscription = Subscription(topics, size or config.EVENTS_QUEUE_SIZE)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self._topics.pop(topic, None)
+
+    def deliver(self, change: ChangeEventM):
+        """
+        Passes `change` to each subscriber of its
+        topics, once. Must be called on the loop
+        the subscribers wait on.
+        """
+
+        subscribers = set()
+        for topic in event_topics(change):
+            subscribers.update(self._topics.get(topic, ()))
+
+        for subscription in subscribers:
+            if subscription.dropped:
+                continue
+            subscription.put(change)
+            if subscription.dropped:
+                self.dropped += 1
+            else:
+                self.delivered += 1
+
+    def deliver_threadsafe(self, change: ChangeEventM):
+        """Delivers `change` from any thread."""
+
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.deliver, change)
+
+    def stats(self):
+        """Subscription and delivery counters."""
+
+        subscribers = set().union(*self._topics.values())
+        return dict\
+        (
+            topics=len(self._topics),
+            subscribers=len(subscribers),
+            delivered=self.delivered,
+            dropped=self.dropped
+        )
+
+
+hub = Hub()
+
+
+class Broker:
+    """
+    Carries committed events to the hub of every
+    worker.
+    """
+
+    def stage(self, session: Session, changes: list[ChangeEventM]):
+        """
+        Called inside the transaction making
+        `changes`, just before it commits.
+        """
+
+    def publish(self, changes: list[ChangeEventM]):
+        """Called once `changes` are committed."""
+
+    async def listen(self):
+        """
+        Passes events from other workers to the hub
+        until cancelled.
+        """
+
+
+class MemoryBroker(Broker):
+    """Publishes to this process only."""
+
+    def publish(self, changes: list[ChangeEventM]):
+        for change in changes:
+            hub.deliver_threadsafe(change)
+
+
+class PostgresBroker(Broker):
+    """
+    Publishes through `NOTIFY`, which Postgres
+    delivers only if the transaction commits, to
+    every worker `LISTEN`ing on one connection.
+    """
+
+    def stage(self, session: Session, changes: list[ChangeEventM]):
+        stmt = text(f"SELECT pg_notify('{CHANNEL}', payload) FROM unnest(:payloads) AS payload")
+        stmt = stmt.bindparams(bindparam("payloads", type_=ARRAY(sqlalchemy.Text)))
+        session.execute(stmt, dict(payloads=[change.json() for change in changes]))
+
+    async def listen(self):
+        logger = logging.getLogger("uvicorn.error")
+        while True:
+            try:
+                async with orm.async_orm_engine().connect() as conn:
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    listener = (await conn.get_raw_connection()).driver_connection
+                    await listener.execute(f"LISTEN {CHANNEL}")
+                    async for notify in listener.notifies():
+                        hub.deliver(ChangeEventM.parse_raw(notify.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("event listener disconnected; reconnecting")
+                await asyncio.sleep(5.0)
+
+
+BROKERS: dict[str, type[Broker]] =\
+{
+    "memory": MemoryBroker,
+    "postgres": PostgresBroker,
+}
+
+if config.EVENTS_BROKER not in BROKERS:
+    raise ValueError\
+        (f"unsupported events broker {config.EVENTS_BROKER!r}, expected one of {tuple(BROKERS)}")
+broker = BROKERS[config.EVENTS_BROKER]()
+
+
+def record_events(session: Session, *changes: ChangeEventM):
+    """
+    Adds `changes` to the transaction of `session`.
+    Writes bypassing the ORM unit of work, such as
+    bulk inserts, record their events this way.
+    """
+
+    session.info.setdefault(_PENDING, []).extend(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, flush_context):
+    tracked = (orm.tickets.ServiceTicket, orm.messages.Message)
+    for action, objs in\
+    (
+        (ACTION_CREATED, session.new),
+        (ACTION_UPDATED, session.dirty),
+        (ACTION_DELETED, session.deleted)
+    ):
+        for obj in objs:
+            if not isinstance(obj, tracked):
+                continue
+            if action == ACTION_UPDATED and not session.is_modified(obj):
+                continue
+            record_events(session, change_event(obj, action))
+
+
+@event.listens_for(Session, "before_commit")
+def _stage_events(session: Session):
+    # Flushed first so that changes flushed by the
+    # commit itself are staged too.
+    session.flush()
+    if session.info.get(_PENDING):
+        broker.stage(session, session.info[_PENDING])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session):
+    changes = session.info.pop(_PENDING, None)
+    if changes:
+        broker.publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def subscribe_events(
+        *,
+        ticket_ids: typing.Iterable[common.UUID_t] = (),
+        owner_ids: typing.Iterable[common.UUID_t] = ()):
+    """
+    Subscribes to changes of the given tickets and
+    of what the given users own.
+    """
+
+    topics = [f"ticket:{ticket_id.hex}" for ticket_id in ticket_ids]
+    topics += [f"owner:{owner_id.hex}" for owner_id in owner_ids]
+    return hub.subscribe(topics)
+
+
+async def listen_events():
+    """
+    Binds the hub to the running loop and relays
+    events from other workers until cancelled.
+    """
+
+    hub.loop = asyncio.get_running_loop()
+    await broker.listen()
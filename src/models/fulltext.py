@@ -0,0 +1,117 @@
+"""
+Ranked full-text search over tickets and their
+messages. See `models.orm.search` for the
+indexes backing it.
+"""
+
+import typing
+
+from sqlalchemy import column, func, literal_column, table, text
+
+import common
+from models import bases, orm, pyd, txllayer
+from models.orm.engine import select
+from models.tickets import ticket_access
+from models.orm.search import fts_table, search_document
+
+SEARCH_SCOPES: dict[str, type[bases.ORMBase]] =\
+{
+    "tickets": orm.tickets.ServiceTicket,
+    "messages": orm.messages.Message,
+}
+
+
+def _fts5_query(phrase: str):
+    """
+    Quotes each term of the user's query so FTS5
+    treats them as plain words, all of which must
+    match.
+    """
+
+    terms = ['"' + term.replace('"', '""') + '"' for term in phrase.split()]
+    return " ".join(terms)
+
+
+def _search_stmt(
+        dialect: str,
+        model: type[bases.ORMBase],
+        phrase: str,
+        accessible_to: common.UUID_t | None,
+        limit: int,
+        offset: int):
+    """
+    Builds the statement selecting one page of
+    matches and their rank, best first. One row
+    past `limit` tells whether more follow.
+    """
+
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(text("'english'"), phrase)
+        document = search_document(model) #type: ignore[arg-type]
+        rank = func.ts_rank(document, query).label("rank")
+        stmt = select(model, rank).where(document.op("@@")(query))
+    else:
+        fts = table(fts_table(model), column("rowid")) #type: ignore[arg-type]
+        fts_name = literal_column(fts.name)
+        # bm25 scores better matches lower.
+        rank = (-func.bm25(fts_name)).label("rank")
+        stmt = select(model, rank)\
+            .join(fts, fts.c.rowid == literal_column(f"{model.__tablename__}.rowid"))\
+            .where(fts_name.op("MATCH")(_fts5_query(phrase)))
+
+    # Messages are reached through their ticket.
+    if accessible_to:
+        if model is orm.messages.Message:
+            stmt = stmt.join(orm.tickets.ServiceTicket, model.ticket_id == orm.tickets.ServiceTicket.id)
+        stmt = stmt.where(ticket_access(accessible_to))
+
+    return stmt\
+        .order_by(rank.desc())\
+        .limit(limit + 1)\
+        .offset(offset)
+
+
+def _search_page(scope: str, rows: typing.Sequence[typing.Any], limit: int, offset: int):
+    """Translates the matched rows into a page."""
+
+    hits = []
+    for obj, rank in rows[:limit]:
+        hits.append\
+        (
+            pyd.search.SearchHitM.construct\
+            (
+                **{scope[:-1]: txllayer.translate(obj, trusted=True)},
+                rank=float(rank)
+            )
+        )
+
+    return pyd.search.SearchPageM.construct\
+    (
+        hits=hits,
+        next_offset=(offset + limit if len(rows) > limit else None)
+    )
+
+
+async def async_search(
+        phrase: str,
+        *,
+        scope: str = "tickets",
+        accessible_to: common.UUID_t | None = None,
+        limit: int = 20,
+        offset: int = 0) -> pyd.search.SearchPageM:
+    """
+    Search the tickets, or messages, matching all
+    words of `phrase`, best matches first. Only
+    tickets the User `accessible_to` owns or is
+    assigned, and their messages, match when
+    given. `phrase` must have a word at least.
+    """
+
+    if not phrase.split():
+        raise ValueError("search phrase has no words")
+
+    model = SEARCH_SCOPES[scope]
+    stmt = _search_stmt\
+        (orm.async_orm_engine().dialect.name, model, phrase, accessible_to, limit, offset)
+    async with orm.async_orm_session() as session:
+        return _search_page(scope, (await session.execute(stmt)).all(), limit, offset)
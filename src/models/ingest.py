@@ -0,0 +1,237 @@
+"""
+Bulk ingestion of tickets and messages. Records
+are validated through the Pydantic models in
+chunks and each valid chunk is written in one
+round trip: `COPY` against Postgres, executemany
+everywhere else.
+"""
+
+import csv, itertools, json, time, typing
+
+import psycopg
+import sqlalchemy
+import yaml
+from sqlalchemy.orm import Session
+
+from models import aggregates, bases, events, orm, pyd
+from models.orm.engine import insert
+
+# Record kinds which can be ingested, and the
+# model validating them and the ORM storing them.
+INGEST_KINDS: dict[str, tuple[type[bases.PYDBase], type[bases.ORMBase]]] =\
+{
+    "tickets": (pyd.tickets.ServiceTicketM, orm.tickets.ServiceTicket),
+    "messages": (pyd.messages.MessageM, orm.messages.Message),
+}
+
+INGEST_FORMATS = ("csv", "ndjson", "yaml")
+
+
+class IngestFormatError(ValueError):
+    """
+    Raised when input cannot be parsed any further
+    in its format.
+    """
+
+
+class MalformedRecord(typing.NamedTuple):
+    """A record which could not be parsed."""
+
+    line: int
+    detail: str
+
+
+def read_records(
+        stream: typing.TextIO,
+        fmt: str) -> typing.Iterator[dict[str, typing.Any] | MalformedRecord]:
+    """
+    Lazily reads mappings from `stream` in the
+    given format. YAML input may be a sequence of
+    mappings or a stream of documents.
+
+    NDJSON lines which are not valid JSON are read
+    as a `MalformedRecord` and reading goes on.
+    Other input which cannot be parsed raises
+    `IngestFormatError` once it is reached.
+    """
+
+    readers =\
+    {
+        "csv": _read_csv,
+        "ndjson": _read_ndjson,
+        "yaml": _read_yaml,
+    }
+    if fmt not in readers:
+        raise ValueError(f"unsupported format {fmt!r}, expected one of {INGEST_FORMATS}")
+    return _reading(readers[fmt](stream))
+
+
+def _reading(records: typing.Iterator[typing.Any]):
+    """Reports input which is not text as such."""
+
+    try:
+        yield from records
+    except UnicodeDecodeError as e:
+        raise IngestFormatError(f"input is not valid UTF-8: {e}") from e
+
+
+def _read_csv(stream: typing.TextIO):
+    """Reads CSV rows, by header, as mappings."""
+
+    reader = csv.DictReader(stream)
+    try:
+        yield from reader
+    except csv.Error as e:
+        # The line failing is not counted as read.
+        raise IngestFormatError(f"line {reader.line_num + 1}: {e}") from e
+
+
+def _read_ndjson(stream: typing.TextIO):
+    """Reads one JSON value per non blank line."""
+
+    for line, text in enumerate(stream, 1):
+        if not text.strip():
+            continue
+        try:
+            yield json.loads(text)
+        except ValueError as e:
+            yield MalformedRecord(line, f"line {line}: {e}")
+
+
+def _read_yaml(stream: typing.TextIO):
+    """Reads mappings from YAML documents."""
+
+    try:
+        for document in yaml.safe_load_all(stream):
+            if isinstance(document, list):
+                yield from document
+            elif document is not None:
+                yield document
+    except yaml.YAMLError as e:
+        raise IngestFormatError(str(e)) from e
+
+
+def _chunks(
+        records: typing.Iterable[typing.Any],
+        chunk_size: int,
+        errors: list[pyd.ingest.IngestErrorM]):
+    """
+    Splits `records` into chunks. Input which
+    cannot be parsed ends the last chunk early,
+    keeping the records read before it, and is
+    reported.
+    """
+
+    records = iter(records)
+    for chunk in itertools.count():
+        batch = []
+        try:
+            for record in records:
+                batch.append(record)
+                if len(batch) == chunk_size:
+                    break
+        except IngestFormatError as e:
+            errors.append(pyd.ingest.IngestErrorM(chunk=chunk, row=None, detail=str(e)))
+            if batch:
+                yield chunk, batch
+            return
+
+        if not batch:
+            return
+        yield chunk, batch
+
+
+def _validate_chunk(
+        records: list[dict[str, typing.Any]],
+        model: type[bases.PYDBase],
+        chunk: int,
+        errors: list[pyd.ingest.IngestErrorM]):
+    """
+    Validates a chunk of records, collecting the
+    errors of those which fail.
+    """
+
+    rows = []
+    for row, record in enumerate(records):
+        if isinstance(record, MalformedRecord):
+            errors.append(pyd.ingest.IngestErrorM(chunk=chunk, row=row, detail=record.detail))
+            continue
+        try:
+            rows.append(model.parse_obj(record).dict())
+        except Exception as e:
+            errors.append(pyd.ingest.IngestErrorM(chunk=chunk, row=row, detail=str(e)))
+    return rows
+
+
+def _copy_rows(session: Session, orm_cls: type[bases.ORMBase], rows: list[dict[str, typing.Any]]):
+    """Writes rows through Postgres `COPY`."""
+
+    columns = sqlalchemy.inspect(orm_cls).columns
+    attrs = list(rows[0])
+    names = ", ".join(columns[attr].name for attr in attrs)
+
+    cursor = session.connection().connection.driver_connection.cursor()
+    with cursor.copy(f"COPY {orm_cls.__tablename__} ({names}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row([row[attr] for attr in attrs])
+
+
+def _write_rows(session: Session, orm_cls: type[bases.ORMBase], rows: list[dict[str, typing.Any]]):
+    """Writes a validated chunk in one round trip."""
+
+    if session.bind.dialect.name == "postgresql":
+        _copy_rows(session, orm_cls, rows)
+    else:
+        session.execute(insert(orm_cls), rows)
+
+
+def ingest_records(
+        records: typing.Iterable[dict[str, typing.Any] | MalformedRecord],
+        kind: str,
+        *,
+        chunk_size: int = 1000) -> pyd.ingest.IngestReportM:
+    """
+    Validates and stores `records` of the given
+    kind, `chunk_size` at a time. Each chunk is
+    its own transaction; a chunk failing to write
+    is reported and skipped. Input which cannot be
+    parsed any further ends the import, keeping
+    the records read before it.
+    """
+
+    if kind not in INGEST_KINDS:
+        raise ValueError(f"unsupported kind {kind!r}, expected one of {tuple(INGEST_KINDS)}")
+    model, orm_cls = INGEST_KINDS[kind]
+
+    errors: list[pyd.ingest.IngestErrorM] = []
+    started, total, inserted = time.perf_counter(), 0, 0
+
+    for chunk, batch in _chunks(records, chunk_size, errors):
+        total += len(batch)
+        rows = _validate_chunk(batch, model, chunk, errors)
+        if not rows:
+            continue
+
+        with orm.orm_session() as session:
+            try:
+                _write_rows(session, orm_cls, rows)
+                events.record_events(session, *events.inserted_events(model, rows))
+                if orm_cls is orm.tickets.ServiceTicket:
+                    for row in rows:
+                        aggregates.record_count(session, row["owner_id"], row["kind"], row["status"])
+                session.commit()
+                inserted += len(rows)
+            except (sqlalchemy.exc.SQLAlchemyError, psycopg.Error) as e:
+                session.rollback()
+                detail = str(getattr(e, "orig", None) or e)
+                errors.append(pyd.ingest.IngestErrorM(chunk=chunk, row=None, detail=detail))
+
+    seconds = time.perf_counter() - started
+    return pyd.ingest.IngestReportM\
+    (
+        rows=total,
+        inserted=inserted,
+        errors=errors,
+        seconds=seconds,
+        rows_per_second=(inserted / seconds if seconds else 0.0)
+    )
@@ -2,11 +2,27 @@
 Management tools and objects for database ORM.
 """
 
-from models.orm import messages, tickets, users
+from models.orm import enums, messages, search, tickets, users
+from models.orm.engine import initialize, orm_engine, orm_session
+from models.orm.engine import async_orm_engine, async_orm_session
+from models.orm.engine import async_warm_pool, warm_pool
+from models.orm.queries import QueryBudgetExceeded, QueryRecorder, record_queries
 
 __all__ =\
 (
+    "enums",
     "messages",
+    "search",
     "tickets",
-    "users"
+    "users",
+    "initialize",
+    "async_warm_pool",
+    "warm_pool",
+    "async_orm_engine",
+    "async_orm_session",
+    "orm_engine",
+    "orm_session",
+    "QueryBudgetExceeded",
+    "QueryRecorder",
+    "record_queries"
 )
@@ -50,4 +50,9 @@ class UserOwnerMixIn(object):
     
     @declared_attr
     def users(cls):
-        return relationship("User", back_populates=cls.__tablename__)
+        return relationship\
+        (
+            "User",
+            back_populates=cls.__tablename__,
+            foreign_keys=f"{cls.__name__}.owner_id"
+        )
@@ -1,14 +1,24 @@
-import contextlib
+import contextlib, logging, time
 
 import sqlalchemy, sqlalchemy.orm
-from sqlalchemy import select, update, delete
+import sqlalchemy.ext.asyncio
+from sqlalchemy import select, insert, update, delete
 
 import config
+from models.bases import ORMBase
+from models.orm import enums
 
 __all__ =\
 (
     "select",
+    "insert",
     "update",
+    "delete",
+    "initialize",
+    "async_warm_pool",
+    "warm_pool",
+    "async_orm_engine",
+    "async_orm_session",
     "orm_engine",
     "orm_session"
 )
@@ -17,16 +27,42 @@ __all__ =\
 # ORM. If in development mode, creates a SQLite
 # database; in memory by default but can be made
 # persistent if ORM_DATABASE is set.
+#
+# The in memory database is opened in shared
+# cache mode so both the synchronous and the
+# asynchronous engines see the same tables.
 if config.DEVELOPMENT_MODE in config.DEV_BASIC | config.DEV_DEBUG:
-    connection_string = f"sqlite:///" + (config.ORM_DATABASE or ":memory:")
+    connection_string = "sqlite:///" +\
+        (config.ORM_DATABASE or "file:compass?mode=memory&cache=shared&uri=true")
+    async_connection_string =\
+        connection_string.replace("sqlite://", "sqlite+aiosqlite://", 1)
 else:
     connection_string = (
     (
-        "postgres+psycopg://"
+        "postgresql+psycopg://"
         f"{config.ORM_USERNAME}:{config.ORM_PASSWORD}"
         "@"
         f"{config.ORM_HOSTNAME}/{config.ORM_DATABASE}"
     ))
+    # psycopg (3) provides both the sync and
+    # async drivers under the same dialect.
+    async_connection_string = connection_string
+
+# Pool sizing only applies to the queued pools
+# used against Postgres; SQLite manages its own
+# connections per thread.
+pool_options = dict\
+(
+    pool_pre_ping=config.ORM_POOL_PRE_PING,
+    pool_recycle=config.ORM_POOL_RECYCLE
+)
+if config.DEVELOPMENT_MODE not in config.DEV_BASIC | config.DEV_DEBUG:
+    pool_options.update\
+    (
+        pool_size=config.ORM_POOL_SIZE,
+        max_overflow=config.ORM_POOL_OVERFLOW,
+        pool_timeout=config.ORM_POOL_TIMEOUT
+    )
 
 # For saftey, delete the connection_string and
 # the ORM_PASSWORD config value. Since we no
@@ -36,12 +72,83 @@ _orm_engine = sqlalchemy.create_engine\
 (
     connection_string,
     echo=(config.DEVELOPMENT_MODE is config.DEV_DEBUG),
-    future=True
+    future=True,
+    **pool_options
+)
+_async_orm_engine = sqlalchemy.ext.asyncio.create_async_engine\
+(
+    async_connection_string,
+    echo=(config.DEVELOPMENT_MODE is config.DEV_DEBUG),
+    future=True,
+    **pool_options
 )
 del connection_string
+del async_connection_string
+del pool_options
 del config.ORM_PASSWORD # Drop reference to password.
 
 
+def initialize():
+    """
+    Creates the tables known to the ORM if they
+    do not already exist, then seeds the enum
+    tables.
+    """
+
+    ORMBase.metadata.create_all(orm_engine())
+    with orm_engine().begin() as connection:
+        enums.seed(connection)
+
+
+def _report_pool_waits(engine: sqlalchemy.Engine, waits: list[float]):
+    """Logs the checkout wait times of a warm up."""
+
+    logger = logging.getLogger("uvicorn.error")
+    if not waits:
+        return
+    logger.info\
+    (
+        f"ORM pool warmed with {len(waits)} connection(s); "
+        f"checkout wait avg={sum(waits) / len(waits) * 1000:.2f}ms "
+        f"max={max(waits) * 1000:.2f}ms; {engine.pool.status()}"
+    )
+
+
+def warm_pool(size: int | None = None):
+    """
+    Opens `size` connections up front, the pool
+    minimum by default, so the first requests
+    after startup do not pay for them. Returns
+    the time waited on each checkout.
+    """
+
+    size = config.ORM_POOL_SIZE if size is None else size
+    waits = []
+    with contextlib.ExitStack() as stack:
+        for _ in range(size):
+            start = time.perf_counter()
+            stack.enter_context(orm_engine().connect())
+            waits.append(time.perf_counter() - start)
+
+    _report_pool_waits(orm_engine(), waits)
+    return waits
+
+
+async def async_warm_pool(size: int | None = None):
+    """Async counterpart of `warm_pool`."""
+
+    size = config.ORM_POOL_SIZE if size is None else size
+    waits = []
+    async with contextlib.AsyncExitStack() as stack:
+        for _ in range(size):
+            start = time.perf_counter()
+            await stack.enter_async_context(async_orm_engine().connect())
+            waits.append(time.perf_counter() - start)
+
+    _report_pool_waits(async_orm_engine().sync_engine, waits)
+    return waits
+
+
 def orm_engine():
     """
     Get ORM engine used in this application.
@@ -50,9 +157,30 @@ def orm_engine():
     return _orm_engine
 
 
+def async_orm_engine():
+    """
+    Get async ORM engine used in this application.
+    """
+
+    return _async_orm_engine
+
+
 @contextlib.contextmanager
 def orm_session(**kwds):
     """Opens a session with the ORM engine."""
 
     with sqlalchemy.orm.Session(orm_engine(), **kwds) as session:
         yield session
+
+
+@contextlib.asynccontextmanager
+async def async_orm_session(**kwds):
+    """
+    Opens a session with the async ORM engine.
+    Objects are not expired on commit, as lazy
+    loading is not available to async sessions.
+    """
+
+    kwds.setdefault("expire_on_commit", False)
+    async with sqlalchemy.ext.asyncio.AsyncSession(async_orm_engine(), **kwds) as session:
+        yield session
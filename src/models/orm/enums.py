@@ -0,0 +1,69 @@
+"""
+Enum tables and the enums they mirror. Their rows
+never change at runtime, so once `seed` has made
+the tables agree with the enums, names are looked
+up in process rather than in the database.
+"""
+
+import enum, logging, types, typing
+
+import sqlalchemy
+from sqlalchemy import insert, select
+
+from models.orm.bases import EnumMixIn
+from models.orm.tickets import TicketKind, TicketKindEnum, TicketStatus, TicketStatusEnum
+from models.orm.users import UserRole, UserRoleEnum, UserStatus, UserStatusEnum
+
+E = typing.TypeVar("E", bound=enum.StrEnum)
+
+ENUM_TABLES: typing.Mapping[type[EnumMixIn], type[enum.StrEnum]] = types.MappingProxyType\
+({
+    UserRole: UserRoleEnum,
+    UserStatus: UserStatusEnum,
+    TicketKind: TicketKindEnum,
+    TicketStatus: TicketStatusEnum,
+})
+
+# Members of each enum by name. Read only.
+ENUM_LOOKUP: typing.Mapping[type[enum.StrEnum], typing.Mapping[str, enum.StrEnum]] =\
+    types.MappingProxyType\
+    ({
+        enum_cls: types.MappingProxyType({member.value: member for member in enum_cls})
+        for enum_cls in ENUM_TABLES.values()
+    })
+
+
+def enum_member(enum_cls: type[E], name: str) -> E:
+    """
+    Get the member of `enum_cls` called `name`.
+    Raises ValueError for names the enum table
+    does not hold.
+    """
+
+    try:
+        return ENUM_LOOKUP[enum_cls][name] #type: ignore[return-value]
+    except KeyError:
+        raise ValueError(f"{name!r} is not a valid {enum_cls.__name__}") from None
+
+
+def seed(connection: sqlalchemy.Connection):
+    """
+    Inserts the enum members missing from their
+    tables. Rows no member matches are reported;
+    they cannot be represented in process.
+    """
+
+    logger = logging.getLogger("uvicorn.error")
+    for table, enum_cls in ENUM_TABLES.items():
+        stored = set(connection.scalars(select(table.name)))
+        missing = [name for name in ENUM_LOOKUP[enum_cls] if name not in stored]
+        if missing:
+            connection.execute(insert(table), [dict(name=name) for name in missing])
+
+        unknown = stored.difference(ENUM_LOOKUP[enum_cls])
+        if unknown:
+            logger.warning\
+            (
+                f"{table.__tablename__} holds values unknown to "
+                f"{enum_cls.__name__}: {sorted(unknown)}"
+            )
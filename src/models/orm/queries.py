@@ -0,0 +1,166 @@
+"""
+Recording of the statements sent to the database,
+to catch N+1 lazy loads and hold code paths to a
+query budget.
+
+    with orm.record_queries(max_queries=3) as rec:
+        client.get("/users/me")
+    assert not rec.repeated()
+
+Nothing is hooked into the engines until the first
+recording starts.
+"""
+
+import contextlib, contextvars, dataclasses, logging, threading, time, typing
+
+import sqlalchemy
+
+from models.orm.engine import async_orm_engine, orm_engine
+
+# A statement run this many times with different
+# parameters is taken for an N+1 pattern.
+REPEAT_THRESHOLD = 3
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a recording runs over budget."""
+
+
+@dataclasses.dataclass(slots=True)
+class RecordedQuery:
+    statement: str
+    parameters: typing.Any
+    seconds: float
+    executemany: bool
+
+
+class QueryRecorder:
+    """Statements captured by `record_queries`."""
+
+    queries: list[RecordedQuery]
+
+    def __init__(self):
+        self.queries = []
+        self._lock   = threading.Lock()
+
+    def __len__(self):
+        return len(self.queries)
+
+    def add(self, query: RecordedQuery):
+        with self._lock:
+            self.queries.append(query)
+
+    @property
+    def seconds(self):
+        """Total time spent in the database."""
+
+        return sum(query.seconds for query in self.queries)
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD):
+        """
+        Statements run at least `threshold` times
+        with differing parameters, mapped to the
+        parameters of each run. Such repeats are
+        usually a relationship lazy loaded per row.
+        """
+
+        runs: dict[str, list[typing.Any]] = {}
+        for query in self.queries:
+            if not query.executemany:
+                runs.setdefault(query.statement, []).append(query.parameters)
+
+        return\
+        {
+            statement: parameters
+            for statement, parameters in runs.items()
+            if len(parameters) >= threshold and len(set(map(repr, parameters))) > 1
+        }
+
+    def report(self):
+        """Summary of this recording, for messages."""
+
+        lines = [f"{len(self)} queries in {self.seconds * 1000:.2f}ms"]
+        for statement, parameters in self.repeated().items():
+            lines.append(f"repeated {len(parameters)}x: {' '.join(statement.split())}")
+        return "\n".join(lines)
+
+
+# Recordings of the current context, and those
+# taking queries from any thread or task.
+_local_recorders: contextvars.ContextVar[tuple[QueryRecorder, ...]] =\
+    contextvars.ContextVar("local_recorders", default=())
+_global_recorders: list[QueryRecorder] = []
+_hooked: set[sqlalchemy.Engine] = set()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._compass_recorded_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorders = _local_recorders.get() + tuple(_global_recorders)
+    if not recorders:
+        return
+
+    seconds = time.perf_counter() - context._compass_recorded_at
+    query = RecordedQuery(statement, parameters, seconds, executemany)
+    for recorder in recorders:
+        recorder.add(query)
+
+
+def _hook_engines():
+    for engine in (orm_engine(), async_orm_engine().sync_engine):
+        if engine in _hooked:
+            continue
+        sqlalchemy.event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        sqlalchemy.event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        _hooked.add(engine)
+
+
+@contextlib.contextmanager
+def record_queries(
+        max_queries: int | None = None,
+        *,
+        local: bool = True,
+        warn_repeated: bool = True) -> typing.Iterator[QueryRecorder]:
+    """
+    Records every statement sent by either ORM
+    engine within this block. Raises
+    `QueryBudgetExceeded` on leaving if more than
+    `max_queries` were sent, and logs statements
+    which look like N+1 patterns if
+    `warn_repeated`.
+
+    Only queries of the current context, and the
+    tasks and threads started from it, are
+    recorded unless `local` is false; that is
+    needed when the queries come from a server
+    running in a thread of its own.
+    """
+
+    _hook_engines()
+    recorder = QueryRecorder()
+    if local:
+        token = _local_recorders.set(_local_recorders.get() + (recorder,))
+    else:
+        _global_recorders.append(recorder)
+
+    try:
+        yield recorder
+    finally:
+        if local:
+            _local_recorders.reset(token)
+        else:
+            _global_recorders.remove(recorder)
+
+    if warn_repeated and recorder.repeated():
+        logging.getLogger("uvicorn.error").warning\
+        (
+            f"possible N+1 queries:\n{recorder.report()}"
+        )
+    if max_queries is not None and len(recorder) > max_queries:
+        raise QueryBudgetExceeded\
+        (
+            f"expected at most {max_queries} queries, got "
+            f"{recorder.report()}"
+        )
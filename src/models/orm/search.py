@@ -0,0 +1,90 @@
+"""
+Full-text search indexes over ticket descriptions
+and message content. Postgres uses GIN indexes on
+`tsvector` expressions; SQLite, in development,
+uses FTS5 tables kept in sync by triggers.
+"""
+
+from sqlalchemy import DDL, Index, event, func, text
+# Registers the full-text search functions, such
+# as `func.to_tsvector`, with their Postgres types.
+import sqlalchemy.dialects.postgresql
+
+from models.orm.messages import Message
+from models.orm.tickets import ServiceTicket
+
+# Tables and the columns searched within them.
+SEARCHABLE =\
+{
+    ServiceTicket: ("short_description", "long_description"),
+    Message: ("content",),
+}
+
+
+def search_document(model: type[ServiceTicket] | type[Message]):
+    """
+    The `tsvector` searched for a model. Indexes
+    and queries must share this expression for
+    Postgres to use the index, so its constants
+    are rendered inline as text.
+    """
+
+    document = None
+    for name in SEARCHABLE[model]:
+        column = func.coalesce(model.__table__.c[name], text("''"))
+        if document is None:
+            document = column
+        else:
+            document = document.op("||")(text("' '")).op("||")(column)
+    return func.to_tsvector(text("'english'"), document)
+
+
+def fts_table(model: type[ServiceTicket] | type[Message]):
+    """Name of the FTS5 table shadowing a model."""
+
+    return f"{model.__tablename__}_fts"
+
+
+def _fts_ddl(model: type[ServiceTicket] | type[Message]):
+    """
+    Statements creating the FTS5 table for a model
+    and the triggers keeping it in sync.
+    """
+
+    table = model.__tablename__
+    fts = fts_table(model)
+    columns = SEARCHABLE[model]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old});"
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.rowid, {new});"
+    return\
+    (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+        f"USING fts5({names}, content='{table}', content_rowid='rowid')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    )
+
+
+for model in SEARCHABLE:
+    Index\
+    (
+        f"ix_{model.__tablename__}_search",
+        search_document(model),
+        postgresql_using="gin"
+    ).ddl_if(dialect="postgresql")
+
+    for statement in _fts_ddl(model):
+        event.listen\
+        (
+            model.__table__,
+            "after_create",
+            DDL(statement).execute_if(dialect="sqlite")
+        )
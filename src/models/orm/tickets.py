@@ -1,11 +1,14 @@
 import enum
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped
+
+from common import UUID_t
 
 from models.bases import ORMBase
 from models.orm.bases import mapped_column, relationship
 from models.orm.bases import EnumMixIn, HistoricalMixIn, IdMixIn
-from models.orm.bases import UserOwnerMixIn, MappedStr
+from models.orm.bases import UserOwnerMixIn, MappedStr, MappedUUID
 
 
 # Dummy types. We replace these in other object
@@ -49,6 +52,16 @@ class TicketStatusEnum(enum.StrEnum):
 
 class ServiceTicket(IdMixIn, HistoricalMixIn, UserOwnerMixIn, ORMBase):
     __tablename__ = "service_tickets"
+    # Keyset pagination walks (created_on, id),
+    # optionally within one kind, status or owner.
+    __table_args__ =\
+    (
+        Index("ix_service_tickets_created_on_id", "created_on", "id"),
+        Index("ix_service_tickets_kind_created_on_id", "kind", "created_on", "id"),
+        Index("ix_service_tickets_status_created_on_id", "status", "created_on", "id"),
+        Index("ix_service_tickets_owner_id_created_on_id", "owner_id", "created_on", "id"),
+        Index("ix_service_tickets_assignee_id", "assignee_id"),
+    )
 
     short_description: MappedStr = mapped_column("short_description", String(64))
     long_description: MappedStr = mapped_column("long_description", String(512))
@@ -63,3 +76,25 @@ class ServiceTicket(IdMixIn, HistoricalMixIn, UserOwnerMixIn, ORMBase):
             back_populates="service_tickets",
             cascade="all, delete-orphan"
         )
+
+    # Agent working the ticket; set when claimed.
+    assignee_id: Mapped[UUID_t | None] = mapped_column\
+    (
+        "assignee_id",
+        ForeignKey("users.id"),
+        default=None,
+        kw_only=True
+    )
+
+
+class TicketCount(ORMBase):
+    __tablename__ = "ticket_counts"
+    # Number of tickets an owner has of one kind
+    # in one status. Kept current by
+    # `models.aggregates` in the same transaction
+    # as the tickets themselves.
+
+    owner_id: MappedUUID = mapped_column("owner_id", ForeignKey("users.id"), primary_key=True)
+    kind: MappedStr = mapped_column("kind", ForeignKey("ticket_kinds.name"), primary_key=True)
+    status: MappedStr = mapped_column("status", ForeignKey("ticket_status.name"), primary_key=True)
+    count: Mapped[int] = mapped_column("count", Integer(), default=0, server_default="0")
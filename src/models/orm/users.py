@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime as datetime_t
 
-from sqlalchemy import BINARY, Boolean, DateTime, ForeignKey, String
+from sqlalchemy import BINARY, Boolean, DateTime, ForeignKey, Index, Integer, String
 
 from models.bases import ORMBase
 from models.orm.bases import mapped_column, relationship
@@ -44,6 +44,11 @@ class UserStatusEnum(enum.StrEnum):
 
 class UserSession(HistoricalMixIn, UserOwnerMixIn, ORMBase):
     __tablename__ = "user_sessions"
+    __table_args__ =\
+    (
+        Index("ix_user_sessions_owner_id_invalid_on", "owner_id", "invalid_on"),
+        Index("ix_user_sessions_invalid_on", "invalid_on"),
+    )
 
     id: Mapped[bytes] = mapped_column("id", BINARY(128), primary_key=True)
     ipaddress: MappedStr = mapped_column("ipaddress", String(15))
@@ -54,10 +59,23 @@ class UserSession(HistoricalMixIn, UserOwnerMixIn, ORMBase):
     )
 
 
+class RevokedSession(ORMBase):
+    __tablename__ = "revoked_sessions"
+    # Sessions ended before they were due to
+    # expire. Signed tokens for these sessions
+    # are rejected until `invalid_on`.
+
+    id: Mapped[bytes] = mapped_column("id", BINARY(128), primary_key=True)
+    invalid_on: Mapped[datetime_t] = mapped_column\
+    (
+        "invalid_on",
+        DateTime(False)
+    )
+
+
 class UserEmail(ORMBase, IdMixIn, HistoricalMixIn):
     __tablename__ = "user_email_addresses"
 
-    is_primary: Mapped[bool] = mapped_column("is_primary", Boolean(), default=False, primary_key=True)
     owner_id: MappedUUID = mapped_column("owner_id", ForeignKey("users.id"))
     contact_id: MappedUUID = mapped_column("contact_id", ForeignKey("user_contacts.owner_id"))
     value: MappedStr = mapped_column("value", String(128))
@@ -68,6 +86,10 @@ class UserEmail(ORMBase, IdMixIn, HistoricalMixIn):
         back_populates=__tablename__
     )
 
+    # Defaulted columns must follow the required
+    # ones for the generated dataclass __init__.
+    is_primary: Mapped[bool] = mapped_column("is_primary", Boolean(), default=False, primary_key=True)
+
 
 class UserContact(ORMBase, UserOwnerMixIn, HistoricalMixIn):
     __tablename__ = "user_contacts"
@@ -120,5 +142,16 @@ class User(ORMBase, IdMixIn, HistoricalMixIn):
     service_tickets: Mapped[list["ServiceTicket"]] = relationship( #type: ignore
         "ServiceTicket",
         collection_class=list,
-        back_populates="users"
+        back_populates="users",
+        foreign_keys="ServiceTicket.owner_id"
+    )
+
+    # Count of unexpired sessions, maintained as
+    # sessions are created, expired and revoked.
+    active_sessions: Mapped[int] = mapped_column\
+    (
+        "active_sessions",
+        Integer(),
+        default=0,
+        server_default="0"
     )
@@ -0,0 +1,60 @@
+"""
+Load plans declare which parts of an ORM object
+graph a lookup fetches, so each endpoint loads
+only what it returns.
+"""
+
+import dataclasses, functools, typing
+
+import sqlalchemy
+from sqlalchemy.orm import defer, joinedload, selectinload
+
+from models import bases
+
+
+@dataclasses.dataclass(frozen=True)
+class LoadPlan:
+    """
+    Relationships to eager load, given as dotted
+    paths from `model`, and columns of `model` to
+    leave unloaded. Relationships outside the plan
+    are not loaded at all; translators skip any
+    attribute that was not loaded.
+    """
+
+    model: type[bases.ORMBase]
+    selectin: tuple[str, ...] = ()
+    joined: tuple[str, ...] = ()
+    deferred: tuple[str, ...] = ()
+
+    @functools.cached_property
+    def options(self) -> tuple[typing.Any, ...]:
+        """Loader options applying this plan."""
+
+        options = []
+        for paths, loader in ((self.selectin, selectinload), (self.joined, joinedload)):
+            for path in paths:
+                options.append(_relationship_option(self.model, path, loader))
+
+        for name in self.deferred:
+            options.append(defer(getattr(self.model, name)))
+        return tuple(options)
+
+    def apply(self, stmt):
+        """Adds the options of this plan to `stmt`."""
+
+        return stmt.options(*self.options)
+
+
+def _relationship_option(model: type[bases.ORMBase], path: str, loader):
+    """
+    Chains `loader` along each relationship of a
+    dotted path.
+    """
+
+    option = None
+    for name in path.split("."):
+        attribute = getattr(model, name)
+        option = loader(attribute) if option is None else getattr(option, loader.__name__)(attribute)
+        model = sqlalchemy.inspect(model).relationships[name].mapper.class_
+    return option
@@ -3,11 +3,14 @@ Collection of Pydantic models representing
 Compass Objects.
 """
 
-from models.pyd import messages, tickets, users
+from models.pyd import events, ingest, messages, search, tickets, users
 
 __all__ =\
 (
+    "events",
+    "ingest",
     "messages",
+    "search",
     "tickets",
     "users"
 )
@@ -0,0 +1,12 @@
+from models.bases import PYDBase
+from models.pyd.bases import UUIDField
+from models.pyd.messages import MessageM
+from models.pyd.tickets import ServiceTicketM
+
+
+class ChangeEventM(PYDBase):
+    action: str
+    ticket_id: UUIDField
+    owner_id: UUIDField
+    ticket: ServiceTicketM | None = None
+    message: MessageM | None = None
@@ -0,0 +1,15 @@
+from models.bases import PYDBase
+
+
+class IngestErrorM(PYDBase):
+    chunk: int
+    row: int | None
+    detail: str
+
+
+class IngestReportM(PYDBase):
+    rows: int
+    inserted: int
+    errors: list[IngestErrorM]
+    seconds: float
+    rows_per_second: float
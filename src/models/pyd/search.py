@@ -0,0 +1,14 @@
+from models.bases import PYDBase
+from models.pyd.messages import MessageM
+from models.pyd.tickets import ServiceTicketM
+
+
+class SearchHitM(PYDBase):
+    rank: float
+    ticket: ServiceTicketM | None = None
+    message: MessageM | None = None
+
+
+class SearchPageM(PYDBase):
+    hits: list[SearchHitM]
+    next_offset: int | None
@@ -1,4 +1,6 @@
+from models.bases import PYDBase
 from models.pyd.bases import HistoricalModel, VarCharField, UUIDField
+from models.pyd.messages import MessageM
 from models.orm.tickets import TicketKindEnum, TicketStatusEnum
 
 
@@ -9,3 +11,19 @@ class ServiceTicketM(HistoricalModel):
     long_description: VarCharField(str, 512) #type: ignore[valid-type]
     kind: TicketKindEnum
     status: TicketStatusEnum
+    assignee_id: UUIDField | None = None
+
+
+class ServiceTicketPageM(PYDBase):
+    tickets: list[ServiceTicketM]
+    next_cursor: str | None
+
+
+class ServiceTicketExportM(ServiceTicketM):
+    messages: list[MessageM]
+
+
+class TicketCountsM(PYDBase):
+    owner_id: UUIDField | None
+    counts: dict[TicketKindEnum, dict[TicketStatusEnum, int]]
+    total: int
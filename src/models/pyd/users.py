@@ -10,11 +10,22 @@ class UserM(HistoricalModel):
     status: UserStatusEnum
     is_active: bool
     hashed_password: bytes
+    active_sessions: int = 0
     user_contacts: "UserContactM"
     user_sessions: list["UserSessionM"]
     service_tickets: list["ServiceTicketM"]
 
 
+# What a User is shown of itself; never the
+# password hash nor its relationships.
+class UserPublicM(HistoricalModel):
+    id: UUIDField
+    role: UserRoleEnum
+    status: UserStatusEnum
+    is_active: bool
+    active_sessions: int = 0
+
+
 class UserSessionM(HistoricalModel):
     id: VarCharField(bytes, 128) #type: ignore[valid-type]
     owner_id: UUIDField
@@ -0,0 +1,277 @@
+"""
+Service ticket lookups. Listings are paginated
+by keyset on (created_at, id), newest first, so
+every page costs the same regardless of depth.
+
+Unassigned tickets form a work queue which agents
+claim from, oldest first.
+"""
+
+import asyncio, contextlib, typing
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+import common
+from models import aggregates, events, orm, pyd, txllayer
+from models.orm.engine import select, update
+from models.orm.enums import enum_member
+from models.plans import LoadPlan
+
+ServiceTicket = orm.tickets.ServiceTicket
+
+# Tickets without their messages.
+TICKET_PLAN = LoadPlan(ServiceTicket)
+
+# Tickets with their messages, as exported.
+TICKET_EXPORT_PLAN = LoadPlan(ServiceTicket, selectin=("messages",))
+
+
+def ticket_access(user_id: common.UUID_t):
+    """Matches the tickets a User owns or is assigned."""
+
+    return (ServiceTicket.owner_id == user_id) | (ServiceTicket.assignee_id == user_id)
+
+
+def _ticket_page_stmt(
+        *,
+        kind: str | None,
+        status: str | None,
+        owner_id: common.UUID_t | None,
+        accessible_to: common.UUID_t | None,
+        cursor: str | None,
+        limit: int,
+        plan: LoadPlan):
+    """
+    Builds the statement selecting one page of
+    tickets. One row past `limit` is selected to
+    tell whether another page follows.
+    """
+
+    # Unknown kinds and statuses are rejected here
+    # rather than matching nothing in the database.
+    stmt = select(ServiceTicket)
+    if kind:
+        stmt = stmt.where(ServiceTicket.kind == enum_member(pyd.tickets.TicketKindEnum, kind))
+    if status:
+        stmt = stmt.where(ServiceTicket.status == enum_member(pyd.tickets.TicketStatusEnum, status))
+    if owner_id:
+        stmt = stmt.where(ServiceTicket.owner_id == owner_id)
+    if accessible_to:
+        stmt = stmt.where(ticket_access(accessible_to))
+
+    if cursor:
+        try:
+            created_at, ticket_id = common.decode_cursor(cursor)
+            keyset = (common.datetime_t.fromisoformat(created_at), common.parse_uuid(ticket_id))
+        except ValueError:
+            raise ValueError(f"invalid cursor {cursor!r}")
+        stmt = stmt.where(tuple_(ServiceTicket.created_at, ServiceTicket.id) < keyset)
+
+    stmt = stmt\
+        .order_by(ServiceTicket.created_at.desc(), ServiceTicket.id.desc())\
+        .limit(limit + 1)
+    return plan.apply(stmt)
+
+
+def _ticket_page(tickets: typing.Sequence[orm.tickets.ServiceTicket], limit: int):
+    """Translates the selected rows into a page."""
+
+    next_cursor = None
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        last = tickets[-1]
+        next_cursor = common.encode_cursor(last.created_at.isoformat(), last.id.hex)
+
+    return pyd.tickets.ServiceTicketPageM.construct\
+    (
+        tickets=txllayer.translate_many(tickets, trusted=True),
+        next_cursor=next_cursor
+    )
+
+
+async def async_list_tickets(
+        *,
+        kind: str | None = None,
+        status: str | None = None,
+        owner_id: common.UUID_t | None = None,
+        accessible_to: common.UUID_t | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+        plan: LoadPlan = TICKET_PLAN) -> pyd.tickets.ServiceTicketPageM:
+    """
+    Get one page of tickets matching the given
+    filters, starting after `cursor`. Only those
+    the User `accessible_to` owns or is assigned
+    are listed when given.
+    """
+
+    stmt = _ticket_page_stmt\
+    (
+        kind=kind,
+        status=status,
+        owner_id=owner_id,
+        accessible_to=accessible_to,
+        cursor=cursor,
+        limit=limit,
+        plan=plan
+    )
+    async with orm.async_orm_session() as session:
+        return _ticket_page((await session.scalars(stmt)).all(), limit)
+
+
+async def async_get_ticket(
+        ticket_id: common.UUID_t,
+        *,
+        accessible_to: common.UUID_t | None = None,
+        plan: LoadPlan = TICKET_PLAN):
+    """
+    Get a single ticket, if it exists and, when
+    `accessible_to` is given, that User owns or is
+    assigned it.
+    """
+
+    stmt = select(ServiceTicket).where(ServiceTicket.id == ticket_id)
+    if accessible_to:
+        stmt = stmt.where(ticket_access(accessible_to))
+    async with orm.async_orm_session() as session:
+        ticket = await session.scalar(plan.apply(stmt))
+        return txllayer.translate(ticket, trusted=True) if ticket else None
+
+
+async def async_accessible_tickets(
+        user_id: common.UUID_t,
+        ticket_ids: typing.Iterable[common.UUID_t]) -> set[common.UUID_t]:
+    """
+    Which of `ticket_ids` the User owns or is
+    assigned.
+    """
+
+    stmt = select(ServiceTicket.id)\
+        .where(ServiceTicket.id.in_(list(ticket_ids)))\
+        .where(ticket_access(user_id))
+    async with orm.async_orm_session() as session:
+        return set((await session.scalars(stmt)).all())
+
+
+def _export_stmt(batch_size: int):
+    """
+    Selects every ticket, streamed from a server
+    side cursor `batch_size` rows at a time.
+    """
+
+    stmt = select(ServiceTicket)\
+        .order_by(ServiceTicket.created_at, ServiceTicket.id)\
+        .execution_options(yield_per=batch_size)
+    return TICKET_EXPORT_PLAN.apply(stmt)
+
+
+def _export_lines(session: Session, tickets: typing.Sequence[orm.tickets.ServiceTicket]):
+    """
+    Serializes a batch of tickets as NDJSON, then
+    releases them from the session so memory use
+    does not grow with the table.
+    """
+
+    lines = "".join\
+    (
+        txllayer.consume_orm2pyd(ticket, pyd.tickets.ServiceTicketExportM, trusted=True).json() + "\n"
+        for ticket in tickets
+    )
+    for ticket in tickets:
+        session.expunge(ticket)
+    return lines
+
+
+def export_tickets(batch_size: int = 1000) -> typing.Iterator[str]:
+    """
+    Yields every ticket, with its messages, as
+    newline delimited JSON; one chunk per batch.
+    """
+
+    with orm.orm_session() as session:
+        result = session.scalars(_export_stmt(batch_size))
+        for tickets in result.partitions():
+            yield _export_lines(session, tickets)
+
+
+async def async_export_tickets(batch_size: int = 1000) -> typing.AsyncIterator[str]:
+    """Async counterpart of `export_tickets`."""
+
+    async with orm.async_orm_session() as session:
+        result = await session.stream_scalars(_export_stmt(batch_size))
+        async for tickets in result.partitions():
+            yield _export_lines(session.sync_session, tickets)
+
+
+# SQLite has no row locks to skip, and its shared
+# cache raises rather than waits on a locked
+# table, so claims there are made one at a time.
+_claim_lock = asyncio.Lock()
+
+
+def _claim_stmt(assignee_id: common.UUID_t, kind: str | None, limit: int):
+    """
+    Builds the statement assigning up to `limit`
+    of the oldest unassigned tickets. Rows locked
+    by concurrent claims are skipped rather than
+    waited on, so claimers never block each other
+    nor take the same ticket.
+    """
+
+    unassigned = ServiceTicket.status == pyd.tickets.TicketStatusEnum.UNASSIGNED
+    queued = select(ServiceTicket.id).where(unassigned)
+    if kind:
+        queued = queued.where(ServiceTicket.kind == enum_member(pyd.tickets.TicketKindEnum, kind))
+    queued = queued\
+        .order_by(ServiceTicket.created_at, ServiceTicket.id)\
+        .limit(limit)\
+        .with_for_update(skip_locked=True)
+
+    return update(ServiceTicket)\
+        .where(ServiceTicket.id.in_(queued.scalar_subquery()))\
+        .where(unassigned)\
+        .values\
+        (
+            status=pyd.tickets.TicketStatusEnum.ASSIGNED,
+            assignee_id=assignee_id,
+            updated_on=common.current_timestamp()
+        )\
+        .returning(ServiceTicket)\
+        .execution_options(synchronize_session=False)
+
+
+def _claimed(session: Session, tickets: typing.Sequence[orm.tickets.ServiceTicket]):
+    """
+    Records the claims as change events and in
+    the ticket counts, as bulk updates bypass the
+    unit of work.
+    """
+
+    unassigned = pyd.tickets.TicketStatusEnum.UNASSIGNED
+    for ticket in tickets:
+        aggregates.record_count(session, ticket.owner_id, ticket.kind, unassigned, -1)
+        aggregates.record_count(session, ticket.owner_id, ticket.kind, ticket.status)
+    events.record_events\
+        (session, *(events.change_event(ticket, events.ACTION_UPDATED) for ticket in tickets))
+    return txllayer.translate_many(tickets, trusted=True)
+
+
+async def async_claim_tickets(
+        assignee_id: common.UUID_t,
+        *,
+        kind: str | None = None,
+        limit: int = 1) -> list[pyd.tickets.ServiceTicketM]:
+    """
+    Assign up to `limit` of the oldest unassigned
+    tickets to `assignee_id`. Fewer are returned
+    when the queue runs short.
+    """
+
+    stmt = _claim_stmt(assignee_id, kind, limit)
+    async with orm.async_orm_session() as session:
+        serialized = session.bind.dialect.name == "sqlite"
+        async with _claim_lock if serialized else contextlib.nullcontext():
+            tickets = _claimed(session.sync_session, (await session.scalars(stmt)).all())
+            await session.commit()
+    return tickets
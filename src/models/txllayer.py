@@ -1,5 +1,7 @@
 import dataclasses, typing
 
+import sqlalchemy
+
 import common
 from models import bases, orm, pyd
 
@@ -9,8 +11,97 @@ MTp = typing.TypeVar("MTp", bound=bases.PYDBase)
 MToTxL = typing.Callable[[MTo], MTp]
 MTpTxL = typing.Callable[[MTp], MTo]
 
-orm2pyd_mapping: dict[bases.ORMBase, MToTxL] = {}
-pyd2pyd_mapping: dict[bases.PYDBase, MTpTxL] = {}
+orm2pyd_mapping: dict[type[bases.ORMBase], MToTxL] = {}
+pyd2pyd_mapping: dict[type[bases.PYDBase], MTpTxL] = {}
+
+# Translators resolved through the MRO of types
+# without a registration of their own. Cleared
+# whenever a translator is registered.
+dispatch_cache: dict[type, MToTxL | MTpTxL] = {}
+
+
+class ORMTranslator(typing.Generic[MTo, MTp]):
+    """
+    Translates instances of an ORM class into a
+    Pydantic model by walking their attributes
+    directly. The fields to copy, and translators
+    for nested relationships, are resolved once
+    when the translator is compiled.
+    """
+
+    orm_cls: type[MTo]
+    pyd_cls: type[MTp]
+    fields: list[tuple[str, "ORMTranslator | None", bool]]
+
+    def __init__(self, orm_cls: type[MTo], pyd_cls: type[MTp]):
+        self.orm_cls = orm_cls
+        self.pyd_cls = pyd_cls
+        self.fields  = []
+
+    def __call__(self, obj: MTo, *, trusted: bool = False) -> MTp:
+        """
+        Translate `obj`. If `trusted`, the values
+        are assumed valid, i.e. read from the
+        database, and are not validated again.
+        """
+
+        # Attributes left out by a load plan are
+        # skipped rather than lazy loaded.
+        unloaded = sqlalchemy.inspect(obj).unloaded
+
+        values = {}
+        for name, nested, many in self.fields:
+            if name in unloaded:
+                continue
+
+            value = getattr(obj, name)
+            if nested and value is not None:
+                if many:
+                    value = [nested(v, trusted=trusted) for v in value]
+                else:
+                    value = nested(value, trusted=trusted)
+            values[name] = value
+
+        if trusted:
+            return self.pyd_cls.construct(**values)
+        return self.pyd_cls(**values)
+
+    def compile(self):
+        """Resolves the fields this translator copies."""
+
+        relationships = sqlalchemy.inspect(self.orm_cls).relationships
+        for name, field in self.pyd_cls.__fields__.items():
+            if not hasattr(self.orm_cls, name):
+                continue
+
+            nested, many = None, False
+            nested_cls = field.type_
+            if name in relationships and isinstance(nested_cls, type)\
+                    and issubclass(nested_cls, bases.PYDBase):
+                relationship = relationships[name]
+                nested = compile_txl(relationship.mapper.class_, nested_cls)
+                many = relationship.uselist
+            self.fields.append((name, nested, many))
+
+        return self
+
+
+compiled_mapping: dict[tuple[type[bases.ORMBase], type[bases.PYDBase]], ORMTranslator] = {}
+
+
+def compile_txl(orm_cls: type[MTo], pyd_cls: type[MTp]) -> ORMTranslator[MTo, MTp]:
+    """
+    Get the translator from `orm_cls` to
+    `pyd_cls`, compiling it on first use.
+    """
+
+    key = (orm_cls, pyd_cls)
+    if key not in compiled_mapping:
+        # Stored before compiling so relationships
+        # referring back to this pair resolve.
+        compiled_mapping[key] = ORMTranslator(orm_cls, pyd_cls)
+        compiled_mapping[key].compile()
+    return compiled_mapping[key]
 
 
 @typing.overload
@@ -23,7 +114,7 @@ def translate(mt: MTp) -> bases.ORMBase:
     ...
 
 
-def translate(mt: MTo | MTp) -> MTp | MTo:
+def translate(mt: MTo | MTp, **kwds) -> MTp | MTo:
     """
     From the given ORM or Pydantic model, get the
     registered callable and do the translation
@@ -31,7 +122,25 @@ def translate(mt: MTo | MTp) -> MTp | MTo:
     """
 
     fn = retrieve_txl(mt)
-    return fn(mt)
+    return fn(mt, **kwds)
+
+
+def translate_many(mts: typing.Iterable[MTo | MTp], **kwds) -> list[MTp | MTo]:
+    """
+    Translate a batch of models. The translator
+    is resolved once per run of same-typed
+    models, so homogeneous batches pay for a
+    single lookup.
+    """
+
+    translated = []
+    cls, fn = None, None
+    for mt in mts:
+        if type(mt) is not cls:
+            cls = type(mt)
+            fn  = retrieve_txl(cls)
+        translated.append(fn(mt, **kwds)) #type: ignore[misc]
+    return translated
 
 
 @typing.overload
@@ -44,19 +153,32 @@ def retrieve_txl(mt: MTp) -> MToTxL:
     ...
 
 
-def retrieve_txl(mt: MTo | MTp) -> MTpTxL | MToTxL:
+def retrieve_txl(mt: MTo | MTp | type[MTo | MTp]) -> MTpTxL | MToTxL:
     """
     Aquires the registered callable used to
     translate that type to the corresponding
-    model type.
+    model type. Types without a registration of
+    their own use the nearest registered base in
+    their MRO.
     """
 
-    if isinstance(mt, bases.ORMBase):
+    cls = mt if isinstance(mt, type) else type(mt)
+    if issubclass(cls, bases.ORMBase):
         target_mapping = orm2pyd_mapping
     else:
         target_mapping = pyd2pyd_mapping #type: ignore[assignment]
 
-    return target_mapping[mt] #type: ignore[index]
+    if cls in target_mapping:
+        return target_mapping[cls] #type: ignore[index]
+    if cls in dispatch_cache:
+        return dispatch_cache[cls]
+
+    for base in cls.__mro__[1:]:
+        if base in target_mapping:
+            dispatch_cache[cls] = target_mapping[base] #type: ignore[index]
+            return dispatch_cache[cls]
+
+    raise KeyError(f"no translator registered for {cls.__qualname__}")
 
 
 @typing.overload
@@ -69,11 +191,15 @@ def register_txl(mt: type[MTp]) -> MTpTxL:
     ...
 
 
-def register_txl(mt: type[MTo | MTp]) -> MToTxL | MTpTxL:
+def register_txl(mt: type[MTo | MTp], target: type[MTp] | None = None) -> MToTxL | MTpTxL:
     """
     Registers the wrapped function as a callable
     which translates the given instance into its
     corresponding model object.
+
+    If `target` is given for an ORM class, a
+    compiled translator is registered instead and
+    returned directly.
     """
 
     if issubclass(mt, bases.ORMBase):
@@ -81,7 +207,13 @@ def register_txl(mt: type[MTo | MTp]) -> MToTxL | MTpTxL:
     else:
         target_mapping = pyd2pyd_mapping #type: ignore[assignment]
 
+    if target:
+        dispatch_cache.clear()
+        target_mapping[mt] = compile_txl(mt, target) #type: ignore[index]
+        return target_mapping[mt] #type: ignore[index]
+
     def wrapper(fn: MToTxL | MTpTxL):
+        dispatch_cache.clear()
         target_mapping[mt] = fn #type: ignore[index]
         return fn
     
@@ -113,10 +245,17 @@ def consume_pyd_object(
     return common.sanitize_dict(obj, blacklist or [])
 
 
-def consume_orm2pyd(obj: bases.ORMBase, pyd_cls: type[bases.PYDBase]):
-    """Digests some ORM into a model instance."""
+def consume_orm2pyd(
+        obj: bases.ORMBase,
+        pyd_cls: type[bases.PYDBase],
+        *,
+        trusted: bool = False):
+    """
+    Digests some ORM into a model instance. If
+    `trusted`, skips validating the values.
+    """
 
-    return pyd_cls(**consume_orm_object(obj))
+    return compile_txl(type(obj), pyd_cls)(obj, trusted=trusted)
 
 
 def consume_pyd2orm(obj: bases.PYDBase, orm_cls: type[bases.ORMBase]):
@@ -147,8 +286,9 @@ def user2orm(obj: pyd.users.UserM):
     return orm.users.User(**user)
 
 
-@register_txl(orm.users.User)
-def user2pyd(obj: orm.users.User):
-    """Consume some User ORM into User model."""
-
-    return pyd.users.UserM(**consume_orm_object(obj))
+user2pyd = register_txl(orm.users.User, pyd.users.UserM)
+usersession2pyd = register_txl(orm.users.UserSession, pyd.users.UserSessionM)
+usercontact2pyd = register_txl(orm.users.UserContact, pyd.users.UserContactM)
+useremail2pyd = register_txl(orm.users.UserEmail, pyd.users.UserEmailM)
+ticket2pyd = register_txl(orm.tickets.ServiceTicket, pyd.tickets.ServiceTicketM)
+message2pyd = register_txl(orm.messages.Message, pyd.messages.MessageM)
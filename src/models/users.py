@@ -0,0 +1,460 @@
+"""
+User lookups and session management. Only ever
+run by the API and its background tasks, so the
+lookups and session writes are async alone and
+their round trips do not block the event loop.
+"""
+
+import asyncio, collections, contextlib, datetime, logging, time, typing
+
+from fastapi import Request
+from sqlalchemy import bindparam
+
+import common, config
+from models import cache, orm, pyd, txllayer
+from models.plans import LoadPlan
+from models.orm.engine import delete, select, update
+
+User = orm.users.User
+UserContact = orm.users.UserContact
+UserSession = orm.users.UserSession
+RevokedSession = orm.users.RevokedSession
+
+# The whole User graph.
+USER_FULL_PLAN = LoadPlan\
+(
+    User,
+    selectin=\
+    (
+        "user_contacts.user_email_addresses",
+        "user_sessions",
+        "service_tickets"
+    )
+)
+
+# What authentication needs. Sessions are counted
+# by `User.active_sessions` so are not loaded.
+USER_AUTH_PLAN = LoadPlan\
+(
+    User,
+    deferred=("hashed_password",)
+)
+
+# Users authenticated by a session, keyed by the
+# session id and tagged by the owner id. Entries
+# remember the plan they were loaded with.
+session_cache: cache.TTLCache[bytes, tuple[LoadPlan, pyd.users.UserM]] =\
+    cache.TTLCache(config.SECURITY_SESSION_CACHE_SIZE)
+
+# Lookups and session purges in flight, so that
+# concurrent identical calls, e.g. a client firing
+# parallel requests with one token, share a single
+# round trip.
+lookup_flights: cache.SingleFlight[tuple] = cache.SingleFlight()
+
+# The in memory SQLite database is opened in
+# shared cache mode, which raises rather than
+# waits when another connection holds a table
+# being read or written. Lookups and writes of
+# users and their sessions are made one at a time
+# there instead.
+_session_lock = asyncio.Lock()
+
+
+def _serialized(session):
+    """Serializes user and session access under SQLite."""
+
+    if session.bind.dialect.name == "sqlite":
+        return _session_lock
+    return contextlib.nullcontext()
+
+# Totals of the expired session sweeper.
+sweeper_stats = dict(runs=0, purged=0, seconds=0.0, last_purged=0, last_seconds=0.0)
+
+# Sessions ended before their expiry, mapped to
+# when they would have expired. Signed tokens and
+# cached sessions are checked against this instead
+# of the database.
+revoked_sessions: dict[bytes, common.datetime_t] = {}
+
+
+def _user_lookup_stmt(
+        username: str | None,
+        password: bytes | None,
+        session_id: bytes | None,
+        plan: LoadPlan):
+    """
+    Builds the statement used to look up users by
+    their credentials or by one of their sessions.
+    """
+
+    common.validate_dependant_args(username=username, password=password)
+    if not (username or session_id):
+        raise ValueError("lookup requires either credentials or a session_id")
+
+    # Session lookups also select when the session
+    # expires, which bounds how long it is cached.
+    stmt = select(User, UserSession.invalid_on) if session_id else select(User)
+    if username:
+        stmt = stmt\
+            .join(User.user_contacts)\
+            .where(UserContact.username == username)\
+            .where(User.hashed_password == password)
+    if session_id:
+        stmt = stmt\
+            .join_from(User, UserSession, User.user_sessions)\
+            .where(UserSession.id == session_id)\
+            .where(UserSession.invalid_on > common.current_timestamp())
+
+    # Relationships are loaded up front as async
+    # sessions cannot lazy load them later.
+    return plan.apply(stmt)
+
+
+def _user_lookup_result(
+        rows: typing.Sequence[typing.Any],
+        expects_unique: bool):
+    """Translates the lookup rows into models."""
+
+    if expects_unique and len(rows) > 1:
+        raise ValueError(f"expected a unique user, found {len(rows)}")
+    return txllayer.translate_many((row[0] for row in rows), trusted=True)
+
+
+def _cached_session_user(
+        session_id: bytes | None,
+        username: str | None,
+        plan: LoadPlan):
+    """
+    Get the cached user owning `session_id`, if
+    the lookup is by session alone and the user
+    was loaded with the same plan. Sessions since
+    revoked, by this or any other worker, are
+    dropped instead.
+    """
+
+    if username or not session_id:
+        return None
+    if session_is_revoked(session_id):
+        session_cache.pop(session_id)
+        return None
+
+    cached_plan, user = session_cache.get(session_id, (None, None))
+    return [user] if user and cached_plan == plan else None
+
+
+def _cache_session_user(
+        session_id: bytes | None,
+        username: str | None,
+        plan: LoadPlan,
+        rows: typing.Sequence[typing.Any],
+        users: list[pyd.users.UserM]):
+    """
+    Caches the user owning `session_id` until
+    either the session or the configured TTL
+    expires, whichever comes first.
+    """
+
+    if username or not session_id or len(users) != 1:
+        return users
+
+    ttl = datetime.timedelta(**config.SECURITY_SESSION_TTL)
+    expires_on = min(rows[0][1], common.current_timestamp() + ttl)
+    session_cache.set(session_id, (plan, users[0]), expires_on, tag=users[0].id)
+    return users
+
+
+def _loaded(model: pyd.users.UserM, name: str):
+    """Whether the lookup plan loaded `name`."""
+
+    return name in model.__fields_set__
+
+
+def _expire_sessions_stmt(user: pyd.users.UserM):
+    """
+    Deletes the expired sessions of a User. Served
+    by the (owner_id, invalid_on) index so only
+    expired rows are touched.
+    """
+
+    return delete(UserSession)\
+        .where(UserSession.owner_id == user.id)\
+        .where(UserSession.invalid_on <= common.current_timestamp())\
+        .execution_options(synchronize_session=False)
+
+
+def _count_sessions_stmt(owner_id: common.UUID_t, delta: int):
+    """Adjusts the active session count of a User."""
+
+    return update(User)\
+        .where(User.id == owner_id)\
+        .values(active_sessions=User.active_sessions + delta)\
+        .execution_options(synchronize_session=False)
+
+
+def _open_session_stmt(owner_id: common.UUID_t):
+    """
+    Counts a new session of a User unless it has
+    as many as it may already. Checked and counted
+    in one statement, so concurrent logins cannot
+    each pass the check.
+    """
+
+    return update(User)\
+        .where(User.id == owner_id)\
+        .where(User.active_sessions < config.SECURITY_MAX_SESSIONS)\
+        .values(active_sessions=User.active_sessions + 1)\
+        .returning(User.active_sessions)\
+        .execution_options(synchronize_session=False)
+
+
+def _sessions_expired(user: pyd.users.UserM, count: int):
+    """Reflects purged sessions on the User model."""
+
+    user.active_sessions = max(user.active_sessions - count, 0)
+    if count and _loaded(user, "user_sessions"):
+        now = common.current_timestamp()
+        user.user_sessions =\
+            [s for s in user.user_sessions if s.invalid_on > now]
+    return user
+
+
+def _session_created(user: pyd.users.UserM, new_session: UserSession, active_sessions: int):
+    """Reflects a new session on the User model."""
+
+    session_cache.invalidate(user.id)
+    new_session = txllayer.consume_orm2pyd(new_session, pyd.users.UserSessionM, trusted=True)
+    user.active_sessions = active_sessions
+    if _loaded(user, "user_sessions"):
+        user.user_sessions.append(new_session)
+    return new_session
+
+
+def _new_session(user: pyd.users.UserM, request: Request):
+    """Builds a new session owned by the User."""
+
+    now = common.current_timestamp()
+    return UserSession\
+    (
+        created_at=now,
+        updated_on=now,
+        id=common.new_session_token(user.id),
+        ipaddress=(request.client.host if request.client else ""),
+        invalid_on=common.future_timestamp(**config.SECURITY_SESSION_TTL),
+        owner_id=user.id
+    )
+
+
+async def async_do_user_lookup(
+        username: str | None = None,
+        password: bytes | None = None,
+        *,
+        session_id: bytes | None = None,
+        expects_unique: bool = False,
+        plan: LoadPlan = USER_FULL_PLAN) -> list[pyd.users.UserM]:
+    """
+    Look up users matching either the given
+    credentials or the given session id, loading
+    what `plan` declares.
+    """
+
+    if cached := _cached_session_user(session_id, username, plan):
+        return cached
+
+    async def lookup():
+        stmt = _user_lookup_stmt(username, password, session_id, plan)
+        async with orm.async_orm_session() as session, _serialized(session):
+            rows = (await session.execute(stmt)).unique().all()
+            users = _user_lookup_result(rows, expects_unique)
+        return _cache_session_user(session_id, username, plan, rows, users)
+
+    key = ("lookup", username, password, session_id, expects_unique, plan)
+    return list(await lookup_flights.async_do(key, lookup))
+
+
+async def async_validate_user_sessions(user: pyd.users.UserM):
+    """
+    Purges the sessions of a User which are no
+    longer valid.
+    """
+
+    async with orm.async_orm_session() as session, _serialized(session):
+        purged = (await session.execute(_expire_sessions_stmt(user))).rowcount
+        if purged:
+            await session.execute(_count_sessions_stmt(user.id, -purged))
+        await session.commit()
+    return _sessions_expired(user, purged)
+
+
+async def async_create_new_session(user: pyd.users.UserM, request: Request):
+    """
+    Creates and stores a new session for the
+    User. Returns `None`, creating nothing, when
+    the User has too many active sessions.
+    """
+
+    new_session = _new_session(user, request)
+    async with orm.async_orm_session() as session, _serialized(session):
+        active_sessions = (await session.execute(_open_session_stmt(user.id))).scalar()
+        if active_sessions is None:
+            await session.rollback()
+            return None
+        session.add(new_session)
+        await session.commit()
+    return _session_created(user, new_session, active_sessions)
+
+
+def _revoke_session_stmt(session_id: bytes):
+    return delete(UserSession)\
+        .where(UserSession.id == session_id)\
+        .returning(UserSession.owner_id, UserSession.invalid_on)\
+        .execution_options(synchronize_session=False)
+
+
+def _revoked_sessions_stmts():
+    """
+    Statements to purge expired revocations and
+    to select the remaining ones.
+    """
+
+    now = common.current_timestamp()
+    return\
+    (
+        delete(RevokedSession).where(RevokedSession.invalid_on <= now),
+        select(RevokedSession.id, RevokedSession.invalid_on)
+    )
+
+
+def _revoked_session(session_id: bytes, invalid_on: common.datetime_t | None):
+    """
+    Records a revocation locally, returning the
+    row to persist for other workers, if any.
+    """
+
+    session_cache.pop(session_id)
+    if not invalid_on:
+        return None
+
+    revoked_sessions[session_id] = invalid_on
+    return RevokedSession(id=session_id, invalid_on=invalid_on)
+
+
+def session_is_revoked(session_id: bytes):
+    """
+    Whether the session was revoked as of the
+    last refresh or by this worker.
+    """
+
+    return session_id in revoked_sessions
+
+
+async def async_revoke_session(session_id: bytes):
+    """
+    Deletes a session, ending it before it would
+    otherwise expire.
+    """
+
+    async with orm.async_orm_session() as session, _serialized(session):
+        owner_id, invalid_on = (await session.execute(_revoke_session_stmt(session_id))).first() or (None, None)
+        if revoked := _revoked_session(session_id, invalid_on):
+            session.add(revoked)
+            await session.execute(_count_sessions_stmt(owner_id, -1))
+        await session.commit()
+
+
+async def async_refresh_revoked_sessions():
+    """
+    Reloads the revoked sessions from the
+    database, dropping those which expired.
+    """
+
+    global revoked_sessions
+
+    purge, query = _revoked_sessions_stmts()
+    async with orm.async_orm_session() as session, _serialized(session):
+        await session.execute(purge)
+        revoked_sessions = dict((await session.execute(query)).tuples().all())
+        await session.commit()
+
+
+def _sweep_batch_stmts(batch_size: int):
+    """
+    Statements selecting, then deleting, the next
+    batch of expired sessions, oldest first. The
+    select is served by the invalid_on index.
+    """
+
+    now = common.current_timestamp()
+    expired = select(UserSession.id)\
+        .where(UserSession.invalid_on <= now)\
+        .order_by(UserSession.invalid_on)\
+        .limit(batch_size)
+
+    def purge(session_ids: list[bytes]):
+        return delete(UserSession)\
+            .where(UserSession.id.in_(session_ids))\
+            .where(UserSession.invalid_on <= now)\
+            .returning(UserSession.owner_id)\
+            .execution_options(synchronize_session=False)
+
+    return expired, purge
+
+
+def _sweep_counts_params(owner_ids: typing.Iterable[common.UUID_t]):
+    """
+    Statement and parameters to decrement the
+    session counts of the owners of swept rows.
+    """
+
+    users = User.__table__
+    stmt = users.update()\
+        .where(users.c.id == bindparam("owner_id"))\
+        .values(active_sessions=users.c.active_sessions - bindparam("purged"))
+    params = [dict(owner_id=k, purged=v) for k, v in collections.Counter(owner_ids).items()]
+    return stmt, params
+
+
+def _record_sweep(purged: int, started: float):
+    """Updates `sweeper_stats` after a sweep."""
+
+    elapsed = time.perf_counter() - started
+    sweeper_stats["runs"] += 1
+    sweeper_stats["purged"] += purged
+    sweeper_stats["seconds"] += elapsed
+    sweeper_stats["last_purged"] = purged
+    sweeper_stats["last_seconds"] = elapsed
+
+    if purged:
+        logging.getLogger("uvicorn.error").info\
+            (f"swept {purged} expired session(s) in {elapsed * 1000:.2f}ms")
+    return purged
+
+
+async def async_sweep_expired_sessions(batch_size: int | None = None):
+    """
+    Deletes every expired session in batches of
+    `batch_size`, each in its own transaction, and
+    returns the number of rows deleted. Yields to
+    the event loop between batches.
+    """
+
+    batch_size = batch_size or config.SECURITY_SESSION_SWEEP_BATCH
+    started, purged = time.perf_counter(), 0
+    while True:
+        expired, purge = _sweep_batch_stmts(batch_size)
+        async with orm.async_orm_session() as session, _serialized(session):
+            session_ids = (await session.scalars(expired)).all()
+            if not session_ids:
+                break
+
+            owner_ids = (await session.scalars(purge(session_ids))).all()
+            if owner_ids:
+                await session.execute(*_sweep_counts_params(owner_ids))
+            await session.commit()
+
+        purged += len(owner_ids)
+        if len(session_ids) < batch_size:
+            break
+        await asyncio.sleep(0)
+
+    return _record_sweep(purged, started)
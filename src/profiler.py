@@ -0,0 +1,248 @@
+"""
+On demand profiling of a running worker. A capture
+lasts a number of seconds, or until a number of
+requests have been served, and reports where the
+time, or the memory, went in the meantime.
+
+`cProfile` only sees the thread it is enabled in,
+here the event loop; synchronous endpoints and
+dependencies run in worker threads, so the
+"sample" mode, which periodically samples the
+stacks of every thread, is the one to use for
+those.
+"""
+
+import asyncio, cProfile, collections, io, os, pstats, sys, threading, time, tracemalloc
+
+PROFILE_MODES = ("cprofile", "sample")
+PROFILE_SORTS = ("cumulative", "tottime", "calls")
+MEMORY_GROUPS = ("lineno", "filename", "traceback")
+
+# Seconds between stack samples.
+SAMPLE_INTERVAL = 0.005
+# Where idle threads wait, by file and function;
+# samples of threads waiting there are skipped.
+# The uvloop event loop waits in C, below the
+# call running it.
+IDLE_FUNCTIONS =\
+{
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("runners.py", "run"),
+}
+
+
+class Capture:
+    """
+    Window of a capture in progress. Done once
+    `requests` requests have been served.
+    """
+
+    requests: int | None
+    served: int
+
+    def __init__(self, requests: int | None):
+        self.requests = requests
+        self.served   = 0
+        self.done     = asyncio.Event()
+
+    def request_served(self):
+        self.served += 1
+        if self.requests is not None and self.served >= self.requests:
+            self.done.set()
+
+    async def wait(self, seconds: float):
+        """
+        Waits until done, or `seconds` at most when
+        counting requests.
+        """
+
+        try:
+            await asyncio.wait_for(self.done.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+# At most one capture runs at a time, so that they
+# do not measure each other.
+capture: Capture | None = None
+_lock = asyncio.Lock()
+
+
+class Busy(RuntimeError):
+    """Raised when a capture is already running."""
+
+
+class ProfilerMiddleware:
+    """
+    Counts the requests served while a capture
+    runs. Costs one check per request otherwise.
+    """
+
+    def __init__(self, app, ignore_prefix: str = "/debug/"):
+        self.app = app
+        self.ignore_prefix = ignore_prefix
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if capture is not None\
+                and scope["type"] == "http"\
+                and not scope["path"].startswith(self.ignore_prefix):
+                capture.request_served()
+
+
+async def _capturing(seconds: float, requests: int | None):
+    """Runs a capture for its window."""
+
+    global capture
+
+    capture = Capture(requests)
+    try:
+        await capture.wait(seconds)
+        return capture.served
+    finally:
+        capture = None
+
+
+class Sampler(threading.Thread):
+    """
+    Samples the stack of every other thread each
+    `interval` seconds, counting the functions
+    found running and those found on the stack.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="compass-sampler", daemon=True)
+        self.interval = interval
+        self.samples  = 0
+        self.idle     = 0
+        self.running: collections.Counter[str] = collections.Counter()
+        self.on_stack: collections.Counter[str] = collections.Counter()
+        self._stopping = threading.Event()
+
+    def run(self):
+        while not self._stopping.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != self.ident:
+                    self._sample(frame)
+
+    def _sample(self, frame):
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS:
+            self.idle += 1
+            return
+
+        self.samples += 1
+        self.running[_where(frame)] += 1
+
+        seen = set()
+        while frame is not None:
+            seen.add(_where(frame))
+            frame = frame.f_back
+        self.on_stack.update(seen)
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+    def report(self, limit: int):
+        """Top functions, by samples running and on the stack."""
+
+        lines = [f"{self.samples} samples, {self.idle} idle, every {self.interval * 1000:.1f}ms"]
+        for title, counter in (("running", self.running), ("on stack", self.on_stack)):
+            lines.append("")
+            lines.append(f"{'samples':>8} {'%':>6}  {title}")
+            for where, count in counter.most_common(limit):
+                lines.append(f"{count:>8} {count / max(self.samples, 1):>6.1%}  {where}")
+        return "\n".join(lines)
+
+
+def _where(frame):
+    code = frame.f_code
+    return f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+
+
+async def profile(
+        seconds: float,
+        requests: int | None = None,
+        mode: str = "cprofile",
+        sort: str = "cumulative",
+        limit: int = 50) -> str:
+    """
+    Profiles this worker for `seconds`, or until
+    `requests` requests were served, and reports
+    the top `limit` functions.
+    """
+
+    if _lock.locked():
+        raise Busy("a capture is already running")
+
+    async with _lock:
+        started = time.perf_counter()
+        if mode == "sample":
+            sampler = Sampler()
+            sampler.start()
+            try:
+                served = await _capturing(seconds, requests)
+            finally:
+                sampler.stop()
+            report = sampler.report(limit)
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                served = await _capturing(seconds, requests)
+            finally:
+                profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+            report = stream.getvalue()
+
+    elapsed = time.perf_counter() - started
+    return f"{mode} profile of {served} requests over {elapsed:.2f}s\n\n{report}"
+
+
+async def trace_memory(
+        seconds: float,
+        requests: int | None = None,
+        group_by: str = "lineno",
+        limit: int = 25,
+        frames: int = 10) -> str:
+    """
+    Reports the top `limit` places memory grew,
+    or shrank, between the start and the end of
+    a capture. Tracing is only on while the
+    capture runs unless it already was.
+    """
+
+    if _lock.locked():
+        raise Busy("a capture is already running")
+
+    async with _lock:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(frames if group_by == "traceback" else 1)
+        try:
+            before = tracemalloc.take_snapshot()
+            served = await _capturing(seconds, requests)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    # Allocations made by tracemalloc itself are
+    # left out.
+    ignored = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    before = before.filter_traces(ignored)
+    after = after.filter_traces(ignored)
+
+    diffs = after.compare_to(before, group_by)
+    total = sum(diff.size_diff for diff in diffs)
+    lines = [f"memory diff of {served} requests: {total / 1024:+.1f} KiB"]
+    for diff in diffs[:limit]:
+        lines.append("")
+        lines.append(f"{diff.size_diff / 1024:+.1f} KiB, {diff.count_diff:+d} blocks")
+        lines.extend(f"    {line}" for line in diff.traceback.format())
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+"""
+Tests run against the in memory SQLite database
+of development mode, through the ASGI interface of
+`api_main`.
+"""
+
+import asyncio, datetime, itertools, os, types
+
+# Must be set before `config` is first imported.
+os.environ["COMPASS_DEVELOPMENT_MODE"] = "basic"
+os.environ["COMPASS_ORM_DATABASE"] = ""
+
+import pytest
+
+import common, config, models
+from api import api_main, oauth
+from bench import ASGIClient
+from models import orm, pyd
+from models.orm.engine import insert
+
+PASSWORD = "test-password"
+
+_usernames = (f"user{n}" for n in itertools.count())
+
+
+@pytest.fixture(scope="session")
+def loop():
+    # One loop for the whole run, as the async
+    # engine pools connections bound to it.
+    loop = asyncio.new_event_loop()
+    orm.initialize()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    return loop.run_until_complete
+
+
+@pytest.fixture
+def client(run):
+    client = ASGIClient(api_main)
+
+    def request(method: str, path: str, *, token: str | None = None, **kwds):
+        headers = dict(kwds.pop("headers", None) or {})
+        if token:
+            headers["authorization"] = f"Bearer {token}"
+        return run(client.request(method, path, headers=headers, **kwds))
+
+    return request
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    models.users.session_cache.clear()
+    yield
+    models.users.session_cache.clear()
+
+
+@pytest.fixture
+def make_user(loop):
+    """
+    Creates a user with `sessions` live and
+    `expired` expired sessions, and `tickets`
+    tickets, each with `messages` messages.
+    """
+
+    def make_user(
+            role: str = pyd.users.UserRoleEnum.AUTHORIZED,
+            *,
+            sessions: int = 1,
+            expired: int = 0,
+            tickets: int = 0,
+            messages: int = 0):
+        now = common.current_timestamp()
+        user_id, username = common.new_uuid(), next(_usernames)
+        rows: dict[type, list[dict]] = {}
+
+        rows[orm.users.User] =\
+        [
+            dict\
+            (
+                id=user_id,
+                created_at=now,
+                updated_on=now,
+                role=role,
+                status=pyd.users.UserStatusEnum.ENABLED,
+                is_active=True,
+                hashed_password=common.rotate_password_hash(PASSWORD, *config.SECURITY_PASSWORD_HASHES),
+                active_sessions=sessions + expired
+            )
+        ]
+        rows[orm.users.UserContact] =\
+        [
+            dict\
+            (
+                owner_id=user_id,
+                created_at=now,
+                updated_on=now,
+                username=username,
+                first_name="Test",
+                last_name=username,
+                phone_number="5550000000"
+            )
+        ]
+
+        tokens, session_rows = [], []
+        for n in range(sessions + expired):
+            session_id = common.new_session_token(user_id)
+            invalid_on = now + datetime.timedelta(days=1 if n < sessions else -1)
+            session_rows.append(dict\
+            (
+                id=session_id,
+                owner_id=user_id,
+                created_at=now,
+                updated_on=now,
+                ipaddress="127.0.0.1",
+                invalid_on=invalid_on
+            ))
+            if n < sessions:
+                token = oauth.encode_token(pyd.users.UserSessionM.construct\
+                    (id=session_id, owner_id=user_id, invalid_on=invalid_on))
+                tokens.append(token.decode() if isinstance(token, bytes) else token)
+        rows[orm.users.UserSession] = session_rows
+
+        ticket_ids = [common.new_uuid() for _ in range(tickets)]
+        rows[orm.tickets.ServiceTicket] =\
+        [
+            dict\
+            (
+                id=ticket_id,
+                owner_id=user_id,
+                created_at=now,
+                updated_on=now,
+                short_description=f"Ticket of {username}",
+                long_description="Seeded for testing.",
+                kind=pyd.tickets.TicketKindEnum.SERVICE,
+                status=pyd.tickets.TicketStatusEnum.UNASSIGNED
+            )
+            for ticket_id in ticket_ids
+        ]
+        rows[orm.messages.Message] =\
+        [
+            dict\
+            (
+                id=common.new_uuid(),
+                owner_id=user_id,
+                ticket_id=ticket_id,
+                created_at=now,
+                updated_on=now,
+                content=f"Message {n}"
+            )
+            for ticket_id in ticket_ids
+            for n in range(messages)
+        ]
+
+        with orm.orm_session() as session:
+            for orm_cls, values in rows.items():
+                if values:
+                    session.execute(insert(orm_cls), values)
+            session.commit()
+
+        return types.SimpleNamespace\
+        (
+            id=user_id,
+            username=username,
+            password=PASSWORD,
+            tokens=tokens,
+            ticket_ids=ticket_ids
+        )
+
+    return make_user
@@ -0,0 +1,114 @@
+"""
+Ticket counts kept as tickets change, checked
+against a recount of the tickets themselves.
+"""
+
+import json
+
+import pytest
+
+import common, models
+from models import orm, pyd
+
+TicketStatus = pyd.tickets.TicketStatusEnum
+TicketKind = pyd.tickets.TicketKindEnum
+
+
+@pytest.fixture
+def owner(make_user):
+    # Seeded tickets bypass the ORM, so are only
+    # counted by a recount.
+    owner = make_user(tickets=2)
+    models.rebuild_ticket_counts()
+    return owner
+
+
+def _counts(owner_id):
+    return models.ticket_counts(owner_id).counts
+
+
+def _assert_recounted(owner_id):
+    kept = _counts(owner_id)
+    models.rebuild_ticket_counts()
+    assert _counts(owner_id) == kept
+    return kept
+
+
+def _new_ticket(owner_id):
+    now = common.current_timestamp()
+    return orm.tickets.ServiceTicket\
+    (
+        id=common.new_uuid(),
+        created_at=now,
+        updated_on=now,
+        owner_id=owner_id,
+        short_description="Counted",
+        long_description="Counted as created.",
+        kind=TicketKind.INCIDENT,
+        status=TicketStatus.UNASSIGNED,
+        messages=[]
+    )
+
+
+def test_created_tickets_are_counted(owner):
+    with orm.orm_session() as session:
+        session.add_all([_new_ticket(owner.id), _new_ticket(owner.id)])
+        session.commit()
+
+    counts = _assert_recounted(owner.id)
+    assert counts[TicketKind.INCIDENT][TicketStatus.UNASSIGNED] == 2
+    assert counts[TicketKind.SERVICE][TicketStatus.UNASSIGNED] == 2
+
+
+def test_status_changes_are_counted(owner):
+    with orm.orm_session() as session:
+        ticket = session.get(orm.tickets.ServiceTicket, owner.ticket_ids[0])
+        ticket.status = TicketStatus.BLOCKED
+        session.commit()
+
+    counts = _assert_recounted(owner.id)
+    assert counts[TicketKind.SERVICE][TicketStatus.UNASSIGNED] == 1
+    assert counts[TicketKind.SERVICE][TicketStatus.BLOCKED] == 1
+
+
+def test_claims_are_counted(run, owner, make_user):
+    agent = make_user(pyd.users.UserRoleEnum.SERVICE)
+
+    # Claimed oldest first, so tickets left by
+    # other tests are claimed along the way.
+    claimed = []
+    while not set(owner.ticket_ids) <= {ticket.id for ticket in claimed}:
+        tickets = run(models.async_claim_tickets(agent.id, limit=100))
+        assert tickets
+        claimed.extend(tickets)
+
+    counts = _assert_recounted(owner.id)
+    assert counts[TicketKind.SERVICE][TicketStatus.UNASSIGNED] == 0
+    assert counts[TicketKind.SERVICE][TicketStatus.ASSIGNED] == 2
+
+
+def test_deleted_tickets_are_counted(owner):
+    with orm.orm_session() as session:
+        session.delete(session.get(orm.tickets.ServiceTicket, owner.ticket_ids[0]))
+        session.commit()
+
+    counts = _assert_recounted(owner.id)
+    assert counts[TicketKind.SERVICE][TicketStatus.UNASSIGNED] == 1
+
+
+def test_counts_of_other_users_are_not_served(client, owner, make_user):
+    other = make_user()
+
+    status, _ = client("GET", f"/tickets/counts?owner_id={owner.id}", token=other.tokens[0])
+    assert status == 403
+
+    status, body = client("GET", "/tickets/counts", token=other.tokens[0])
+    assert status == 200
+    assert json.loads(body)["total"] == 0
+
+    status, body = client("GET", "/tickets/counts", token=owner.tokens[0])
+    assert json.loads(body)["total"] == 2
+
+    admin = make_user(pyd.users.UserRoleEnum.ADMINISTRATOR)
+    status, body = client("GET", f"/tickets/counts?owner_id={owner.id}", token=admin.tokens[0])
+    assert json.loads(body)["total"] == 2
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+import debugger
+from models import pyd
+
+LOGGER = "uvicorn.error"
+
+
+class CountedRepr:
+    formatted = 0
+
+    def __repr__(self):
+        CountedRepr.formatted += 1
+        return "counted"
+
+
+def _messages(caplog):
+    return [record.getMessage() for record in caplog.records if record.name == LOGGER]
+
+
+def test_sampled_calls_are_logged_with_timings(caplog):
+    traced = debugger.debug(sample_rate=1.0)(lambda x, y=2: x * y)
+
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        assert traced(3, y=4) == 12
+
+    callargs, returned = _messages(caplog)
+    assert "args=(3,)" in callargs and "kwds={'y': 4}" in callargs
+    assert "RT value: 12" in returned and "wall=" in returned and "cpu=" in returned
+
+
+def test_unsampled_calls_are_not_logged(caplog):
+    traced = debugger.debug(sample_rate=0.0)(lambda x: x)
+
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        assert traced(1) == 1
+    assert not _messages(caplog)
+
+
+def test_nothing_is_formatted_below_the_logged_level(caplog):
+    traced = debugger.debug(level=logging.DEBUG, sample_rate=1.0)(lambda x: x)
+    CountedRepr.formatted = 0
+
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        traced(CountedRepr())
+    assert CountedRepr.formatted == 0
+
+    with caplog.at_level(logging.DEBUG, logger=LOGGER):
+        traced(CountedRepr())
+    assert CountedRepr.formatted
+
+
+def test_failed_calls_are_always_logged(caplog):
+    @debugger.debug(sample_rate=0.0)
+    def fail(x):
+        raise KeyError(x)
+
+    with caplog.at_level(logging.INFO, logger=LOGGER), pytest.raises(KeyError):
+        fail("missing")
+    assert any("fail failed with args: ('missing',)" in message for message in _messages(caplog))
+
+
+def test_short_repr_is_bounded():
+    short_repr = debugger.ShortRepr(60).repr
+
+    assert len(short_repr(list(range(1000)))) <= 60
+    assert short_repr(list(range(20))).endswith("...]")
+
+    ticket = pyd.tickets.ServiceTicketM.construct(short_description="x" * 500, long_description="y")
+    text = short_repr(ticket)
+    assert text.startswith("ServiceTicketM(") and len(text) <= 60
@@ -0,0 +1,42 @@
+"""
+`encode_json` stands in for FastAPI's
+`jsonable_encoder` on responses, so both must
+produce the same JSON.
+"""
+
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+import common, models
+from models import pyd
+
+
+def _assert_parity(obj):
+    assert json.loads(models.encode_json(obj)) == jsonable_encoder(obj)
+
+
+def test_ticket_page_parity(run, make_user):
+    owner = make_user(tickets=3)
+    page = run(models.async_list_tickets(owner_id=owner.id, limit=2))
+
+    assert page.next_cursor and len(page.tickets) == 2
+    _assert_parity(page)
+
+
+def test_user_parity(run, make_user):
+    session_id = common.decode_token(make_user(tickets=1).tokens[0])
+    full, = run(models.async_do_user_lookup(session_id=session_id, plan=models.USER_FULL_PLAN))
+    auth, = run(models.async_do_user_lookup(session_id=session_id, plan=models.USER_AUTH_PLAN))
+
+    _assert_parity(full)
+    _assert_parity(auth)
+    _assert_parity(pyd.users.UserPublicM.construct(**auth.dict(include=set(pyd.users.UserPublicM.__fields__))))
+
+
+def test_current_user_is_public(client, make_user):
+    user = make_user()
+    status, body = client("GET", "/users/me", token=user.tokens[0])
+
+    assert status == 200
+    assert set(json.loads(body)) == set(pyd.users.UserPublicM.__fields__)
@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+import sqlalchemy
+
+import models
+from models import ENUM_LOOKUP, enum_member
+from models.bases import ORMBase
+from models.orm import enums
+from models.orm.engine import delete, insert, orm_session, select
+
+
+@pytest.fixture
+def connection():
+    # A database of its own, so tables can be
+    # emptied without touching the shared one.
+    engine = sqlalchemy.create_engine("sqlite://")
+    ORMBase.metadata.create_all(engine)
+    with engine.begin() as connection:
+        yield connection
+    engine.dispose()
+
+
+def _stored(connection, table):
+    return set(connection.scalars(select(table.name)))
+
+
+def test_tables_hold_every_member(loop):
+    with orm_session() as session:
+        for table, enum_cls in enums.ENUM_TABLES.items():
+            assert set(session.scalars(select(table.name))) == {member.value for member in enum_cls}
+
+
+def test_seed_inserts_missing_members_once(connection):
+    enums.seed(connection)
+    table, enum_cls = enums.TicketStatus, enums.TicketStatusEnum
+    connection.execute(delete(table).where(table.name == enum_cls.BLOCKED))
+
+    enums.seed(connection)
+    enums.seed(connection)
+    assert _stored(connection, table) == {member.value for member in enum_cls}
+    assert connection.scalar(select(sqlalchemy.func.count()).select_from(table)) == len(enum_cls)
+
+
+def test_seed_reports_unknown_rows(connection, caplog):
+    connection.execute(insert(enums.TicketKind), [dict(name="legacy")])
+
+    with caplog.at_level(logging.WARNING, logger="uvicorn.error"):
+        enums.seed(connection)
+
+    assert "legacy" in caplog.text
+    assert "legacy" in _stored(connection, enums.TicketKind)
+
+
+def test_enum_member_lookup():
+    assert enum_member(enums.TicketKindEnum, "incident") is enums.TicketKindEnum.INCIDENT
+    with pytest.raises(ValueError):
+        enum_member(enums.TicketKindEnum, "INCIDENT")
+    with pytest.raises(TypeError):
+        ENUM_LOOKUP[enums.TicketKindEnum]["bogus"] = enums.TicketKindEnum.SERVICE #type: ignore[index]
+
+
+def test_unknown_filter_is_rejected(run):
+    with pytest.raises(ValueError):
+        run(models.async_list_tickets(status="bogus"))
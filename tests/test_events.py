@@ -0,0 +1,55 @@
+import fastapi
+import pytest
+
+import models
+from api import events
+from models import orm, pyd
+from models.orm.engine import update
+
+
+def _topics(run, *args):
+    async def subscribe():
+        with await events._subscribe(*args) as subscription:
+            return subscription.topics
+    return run(subscribe())
+
+
+def _user(token: str, run):
+    return run(models.async_do_user_lookup\
+        (session_id=events.oauth.decode_token(token), plan=models.USER_AUTH_PLAN))[0]
+
+
+def test_cannot_follow_records_of_other_users(client, make_user):
+    user, other = make_user(tickets=1), make_user(tickets=1)
+    token = user.tokens[0]
+
+    status, _ = client("GET", f"/events?owner_id={other.id}", token=token)
+    assert status == 403
+    status, _ = client("GET", f"/events?ticket_id={other.ticket_ids[0]}", token=token)
+    assert status == 403
+    status, _ = client("GET", f"/events?ticket_id={user.ticket_ids[0]}&ticket_id={other.ticket_ids[0]}", token=token)
+    assert status == 403
+
+
+def test_follows_own_and_assigned_tickets(run, make_user):
+    user, other = make_user(tickets=1), make_user(tickets=2)
+    with orm.orm_session() as session:
+        session.execute(update(orm.tickets.ServiceTicket)\
+            .where(orm.tickets.ServiceTicket.id == other.ticket_ids[0])\
+            .values(assignee_id=user.id))
+        session.commit()
+
+    current_user = _user(user.tokens[0], run)
+    allowed = [user.ticket_ids[0], other.ticket_ids[0]]
+    assert len(_topics(run, current_user, allowed, [current_user.id])) == 3
+
+    with pytest.raises(fastapi.HTTPException) as error:
+        _topics(run, current_user, [other.ticket_ids[1]], [])
+    assert error.value.status_code == 403
+
+
+def test_privileged_users_follow_anyone(run, make_user):
+    other = make_user(tickets=1)
+    for role in (pyd.users.UserRoleEnum.SERVICE, pyd.users.UserRoleEnum.ADMINISTRATOR):
+        current_user = _user(make_user(role).tokens[0], run)
+        assert len(_topics(run, current_user, other.ticket_ids, [other.id])) == 2
@@ -0,0 +1,75 @@
+import asyncio, hashlib, threading, time
+
+import pytest
+
+import common, config, hashing
+
+
+def sha256(password: str | bytes) -> bytes:
+    if isinstance(password, str):
+        password = password.encode()
+    return hashlib.sha256(password).digest()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # A fresh pool and limiter sized by the test.
+    monkeypatch.setattr(hashing, "_executor", None)
+    monkeypatch.setattr(hashing, "_limiter", None)
+    yield monkeypatch
+    hashing.shutdown()
+
+
+def test_hash_matches_synchronous_chain(run, pool):
+    expected = common.rotate_password_hash("secret", sha256)
+    assert run(hashing.rotate_password_hash("secret", sha256)) == expected
+
+
+def test_hash_runs_off_the_event_loop(run, pool):
+    threads = []
+
+    def record_thread(password):
+        threads.append(threading.get_ident())
+        return sha256(password)
+
+    run(hashing.rotate_password_hash("secret", record_thread))
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_concurrent_hashes_are_bounded(run, pool):
+    pool.setattr(config, "SECURITY_HASH_CONCURRENCY", 2)
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def slow_hash(password):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return sha256(password)
+
+    async def hash_many():
+        return await asyncio.gather(*(hashing.rotate_password_hash(f"p{n}", slow_hash) for n in range(6)))
+
+    assert len(run(hash_many())) == 6
+    assert peak[0] == 2
+    assert hashing.stats()["queue_depth"] == hashing.stats()["running"] == 0
+
+
+def test_full_queue_rejects_hashes(run, pool):
+    pool.setattr(config, "SECURITY_HASH_CONCURRENCY", 1)
+    pool.setattr(config, "SECURITY_HASH_QUEUE_LIMIT", 1)
+    pool.setattr(hashing, "rejected", 0)
+
+    def slow_hash(password):
+        time.sleep(0.02)
+        return sha256(password)
+
+    async def hash_many():
+        hashes = (hashing.rotate_password_hash(f"p{n}", slow_hash) for n in range(3))
+        return await asyncio.gather(*hashes, return_exceptions=True)
+
+    results = run(hash_many())
+    assert [type(result) for result in results].count(hashing.HashQueueFull) == 1
+    assert hashing.stats()["rejected"] == 1
@@ -0,0 +1,94 @@
+import io, json
+
+import click.testing
+import pytest
+
+import common, models
+from cli.main import main_cli
+from models import pyd
+
+
+def _ticket(owner_id):
+    now = common.current_timestamp().isoformat()
+    return dict\
+    (
+        id=common.new_uuid().hex,
+        owner_id=owner_id.hex,
+        created_at=now,
+        updated_on=now,
+        short_description="Imported",
+        long_description="Imported for testing.",
+        kind="service",
+        status="unassigned"
+    )
+
+
+def _ingest(text: str, fmt: str, chunk_size: int = 1000):
+    return models.ingest_records(models.read_records(io.StringIO(text), fmt), "tickets", chunk_size=chunk_size)
+
+
+def test_malformed_ndjson_line_is_reported_and_skipped(make_user):
+    owner = make_user()
+    text = "\n".join([json.dumps(_ticket(owner.id)), "{bad", json.dumps(_ticket(owner.id))])
+
+    report = _ingest(text, "ndjson")
+    assert (report.rows, report.inserted) == (3, 2)
+    [error] = report.errors
+    assert (error.chunk, error.row) == (0, 1)
+    assert error.detail.startswith("line 2:")
+
+
+def test_malformed_csv_keeps_rows_read_before_it(make_user):
+    owner = make_user()
+    fields = list(_ticket(owner.id))
+    lines = [",".join(fields), ",".join(_ticket(owner.id).values())]
+    lines.append(",".join(_ticket(owner.id).values()).replace("Imported", "x" * 200000, 1))
+
+    report = _ingest("\n".join(lines) + "\n", "csv", chunk_size=10)
+    assert (report.rows, report.inserted) == (1, 1)
+    [error] = report.errors
+    assert error.row is None
+    assert error.detail.startswith("line 3:")
+
+
+def test_malformed_yaml_keeps_documents_read_before_it(make_user):
+    owner = make_user()
+    text = json.dumps(_ticket(owner.id)) + "\n---\nkind: [service\n"
+
+    report = _ingest(text, "yaml")
+    assert (report.rows, report.inserted) == (1, 1)
+    [error] = report.errors
+    assert error.row is None
+    assert "line 3" in error.detail
+
+
+def test_unknown_format_is_rejected_up_front():
+    with pytest.raises(ValueError):
+        models.read_records(io.StringIO(""), "xml")
+
+
+def test_import_endpoint_reports_malformed_input(client, make_user):
+    token = make_user(pyd.users.UserRoleEnum.SERVICE).tokens[0]
+
+    status, body = client("POST", "/tickets/import?format=yaml", token=token, body=b"kind: [service\n")
+    assert status == 200
+    report = json.loads(body)
+    assert report["inserted"] == 0
+    assert report["errors"][0]["row"] is None
+
+    status, _ = client("POST", "/tickets/import?format=ndjson", token=token, body=b"\xff\xfe{}")
+    assert status == 400
+
+
+def test_import_command_reports_malformed_input(tmp_path, make_user):
+    owner = make_user()
+    source = tmp_path / "tickets.yaml"
+    source.write_text(json.dumps(_ticket(owner.id)) + "\n---\nkind: [service\n")
+
+    result = click.testing.CliRunner(mix_stderr=False).invoke(main_cli, ["import", str(source)])
+    assert result.exit_code == 0, result.output
+    assert "imported 1/1 tickets" in result.stdout
+    assert "all rows" in result.stderr
+
+    result = click.testing.CliRunner().invoke(main_cli, ["import", "--format", "ndjson", str(tmp_path / "missing")])
+    assert result.exit_code == 2
@@ -0,0 +1,7 @@
+import config
+
+
+def test_metrics_off_by_default(client):
+    assert not config.METRICS_ENABLED
+    status, _ = client("GET", "/metrics")
+    assert status == 404
@@ -0,0 +1,58 @@
+"""
+Load plans fetch only what they declare, in a
+fixed number of queries, and translation never
+loads the rest.
+"""
+
+import sqlalchemy
+
+import common, models
+from models import orm, txllayer
+from models.orm.engine import select
+
+
+def _lookup(run, user, plan):
+    session_id = common.decode_token(user.tokens[0])
+    users = run(models.async_do_user_lookup(session_id=session_id, plan=plan))
+    assert len(users) == 1
+    return users[0]
+
+
+def test_auth_plan_leaves_password_and_relationships_out(run, make_user):
+    user = _lookup(run, make_user(sessions=2, tickets=2), models.USER_AUTH_PLAN)
+
+    loaded = user.__fields_set__
+    assert {"id", "role", "status", "is_active", "active_sessions"} <= loaded
+    assert not loaded & {"hashed_password", "user_contacts", "user_sessions", "service_tickets"}
+
+
+def test_full_plan_loads_the_graph(run, make_user):
+    user = _lookup(run, make_user(sessions=2, tickets=3), models.USER_FULL_PLAN)
+
+    assert user.hashed_password
+    assert len(user.user_sessions) == 2
+    assert len(user.service_tickets) == 3
+    assert user.user_contacts.user_email_addresses == []
+
+
+def test_plan_queries_do_not_grow_with_rows(make_user):
+    def load(user):
+        stmt = models.USER_FULL_PLAN.apply(select(orm.users.User).where(orm.users.User.id == user.id))
+        with orm.record_queries() as recorder, orm.orm_session() as session:
+            txllayer.translate(session.scalars(stmt).one(), trusted=True)
+        return len(recorder)
+
+    assert load(make_user(sessions=1, tickets=1)) == load(make_user(sessions=4, tickets=8))
+
+
+def test_deferred_columns_are_not_loaded(make_user):
+    user = make_user()
+    stmt = models.USER_AUTH_PLAN.apply(select(orm.users.User).where(orm.users.User.id == user.id))
+
+    with orm.record_queries(max_queries=1), orm.orm_session() as session:
+        orm_user = session.scalars(stmt).one()
+        unloaded = sqlalchemy.inspect(orm_user).unloaded
+        translated = txllayer.translate(orm_user, trusted=True)
+
+    assert {"hashed_password", "user_sessions", "service_tickets", "user_contacts"} <= unloaded
+    assert "hashed_password" not in translated.__fields_set__
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+import profiler
+from api import api_main
+from bench import ASGIClient
+from models import pyd
+
+
+@pytest.fixture
+def admin(make_user):
+    return make_user(pyd.users.UserRoleEnum.ADMINISTRATOR)
+
+
+def _capture(run, token: str, path: str, *others: str):
+    """
+    Requests a capture at `path` while `others`
+    are served, returning the status and text of
+    the capture.
+    """
+
+    client = ASGIClient(api_main)
+    headers = {"authorization": f"Bearer {token}"}
+
+    async def capture():
+        captured = asyncio.ensure_future(client.request("GET", path, headers=headers))
+        await asyncio.sleep(0.01)
+        for other in others:
+            await client.request("GET", other, headers=headers)
+        status, body = await captured
+        return status, body.decode()
+
+    return run(capture())
+
+
+def test_profiling_requires_administrator(client, make_user):
+    token = make_user(pyd.users.UserRoleEnum.SERVICE).tokens[0]
+    assert client("GET", "/debug/profile?seconds=0.01", token=token)[0] == 403
+    assert client("GET", "/debug/memory?seconds=0.01", token=token)[0] == 403
+
+
+@pytest.mark.parametrize("mode", profiler.PROFILE_MODES)
+def test_profile_ends_after_requests(run, admin, mode):
+    status, report = _capture\
+        (run, admin.tokens[0], f"/debug/profile?seconds=5&requests=2&mode={mode}", "/", "/users/me")
+
+    assert status == 200
+    assert report.startswith(f"{mode} profile of 2 requests")
+
+
+def test_debug_requests_are_not_counted(run, admin):
+    status, report = _capture\
+        (run, admin.tokens[0], "/debug/profile?seconds=0.2&requests=1", "/debug/profile?seconds=0.01")
+
+    assert status == 200
+    assert report.startswith("cprofile profile of 0 requests")
+
+
+def test_memory_is_traced(run, admin):
+    status, report = _capture(run, admin.tokens[0], "/debug/memory?seconds=5&requests=1", "/")
+
+    assert status == 200
+    assert report.startswith("memory diff of 1 requests")
+
+
+def test_one_capture_at_a_time(run, admin):
+    status, _ = _capture(run, admin.tokens[0], "/debug/profile?seconds=0.2")
+    assert status == 200
+
+    async def overlapping():
+        first = asyncio.ensure_future(profiler.profile(0.2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(profiler.Busy):
+            await profiler.profile(0.01)
+        return await first
+
+    assert run(overlapping()).startswith("cprofile profile of 0 requests")
@@ -0,0 +1,63 @@
+"""
+Query budgets of the hot endpoints. A budget
+holds whatever the number of rows served, so a
+relationship loaded per row breaks it.
+"""
+
+import logging
+
+import pytest
+
+from models import orm
+from models.orm.engine import select
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user(sessions=3, tickets=20, messages=3)
+
+
+def test_current_user_budget(client, owner):
+    # Looking the session up loads the User.
+    with orm.record_queries(max_queries=1):
+        status, _ = client("GET", "/users/me", token=owner.tokens[0])
+    assert status == 200
+
+    # Then it is served from the session cache.
+    with orm.record_queries(max_queries=0):
+        status, _ = client("GET", "/users/me", token=owner.tokens[0])
+    assert status == 200
+
+
+def test_ticket_page_budget(client, owner):
+    with orm.record_queries(max_queries=2) as recorder:
+        status, _ = client("GET", "/tickets?limit=500", token=owner.tokens[0])
+    assert status == 200
+    assert not recorder.repeated()
+
+
+def test_ticket_budget(client, owner):
+    with orm.record_queries(max_queries=2):
+        status, _ = client("GET", f"/tickets/{owner.ticket_ids[0]}", token=owner.tokens[0])
+    assert status == 200
+
+
+def test_budget_exceeded(client, owner):
+    with pytest.raises(orm.QueryBudgetExceeded):
+        with orm.record_queries(max_queries=0):
+            client("GET", "/users/me", token=owner.tokens[0])
+
+
+def test_lazy_load_per_row_is_reported(owner, caplog):
+    ticket_ids = owner.ticket_ids[:5]
+    stmt = select(orm.tickets.ServiceTicket)\
+        .where(orm.tickets.ServiceTicket.id.in_(ticket_ids))
+
+    with caplog.at_level(logging.WARNING, logger="uvicorn.error"):
+        with orm.record_queries() as recorder, orm.orm_session() as session:
+            for ticket in session.scalars(stmt):
+                assert len(ticket.messages) == 3
+
+    assert len(recorder) == 1 + len(ticket_ids)
+    assert len(recorder.repeated()) == 1
+    assert "possible N+1 queries" in caplog.text
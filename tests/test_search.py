@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from models import pyd
+
+
+def _search(client, user, q: str, scope: str = "tickets"):
+    status, body = client("GET", f"/search?q={q}&scope={scope}&limit=100", token=user.tokens[0])
+    return status, (json.loads(body) if status == 200 else body)
+
+
+def _hit_ids(page, scope: str):
+    return {hit[scope[:-1]]["id"] for hit in page["hits"]}
+
+
+def test_search_finds_own_tickets_only(client, make_user):
+    owner, other = make_user(tickets=2), make_user(tickets=1)
+
+    status, page = _search(client, other, "Ticket+of")
+    assert status == 200
+    assert _hit_ids(page, "tickets") == {str(ticket_id) for ticket_id in other.ticket_ids}
+
+    status, page = _search(client, make_user(pyd.users.UserRoleEnum.SERVICE), owner.username)
+    assert _hit_ids(page, "tickets") == {str(ticket_id) for ticket_id in owner.ticket_ids}
+
+
+def test_search_finds_messages_of_own_tickets_only(client, make_user):
+    make_user(tickets=1, messages=2)
+    other = make_user(tickets=1, messages=1)
+
+    status, page = _search(client, other, "Message", scope="messages")
+    assert status == 200
+    assert {hit["message"]["ticket_id"] for hit in page["hits"]} == {str(other.ticket_ids[0])}
+    assert len(page["hits"]) == 1
+
+
+@pytest.mark.parametrize("q", ["%20", "%20%20%09"])
+def test_search_without_words_is_rejected(client, make_user, q):
+    status, _ = _search(client, make_user(), q)
+    assert status == 400
+
+
+def test_search_of_punctuation_matches_nothing(client, make_user):
+    status, page = _search(client, make_user(tickets=1), "%22%21%21")
+    assert status == 200
+    assert page["hits"] == []
@@ -0,0 +1,122 @@
+import asyncio, datetime, threading
+
+from sqlalchemy import func
+
+import common, config, models
+from api import api_main
+from bench import ASGIClient
+from models import cache, orm
+from models.orm.engine import delete, select
+
+
+def test_session_revoked_by_another_worker_is_not_served_from_cache(client, run, make_user):
+    user = make_user()
+    token = user.tokens[0]
+    session_id = common.decode_token(token)
+
+    status, _ = client("GET", "/users/me", token=token)
+    assert status == 200
+    assert session_id in models.users.session_cache
+
+    # Another worker ends the session; this one
+    # only learns of it through the refresh.
+    with orm.orm_session() as session:
+        session.execute(delete(orm.users.UserSession).where(orm.users.UserSession.id == session_id))
+        session.add(orm.users.RevokedSession(id=session_id, invalid_on=common.future_timestamp(days=1)))
+        session.commit()
+    run(models.async_refresh_revoked_sessions())
+
+    status, _ = client("GET", "/users/me", token=token)
+    assert status == 400
+    assert session_id not in models.users.session_cache
+
+
+def test_ttl_cache_shared_between_threads():
+    ttl_cache: cache.TTLCache[int, int] = cache.TTLCache(64)
+    expires_on = common.current_timestamp() + datetime.timedelta(minutes=1)
+    errors = []
+
+    def churn(offset: int):
+        try:
+            for n in range(5000):
+                key = (n + offset) % 128
+                ttl_cache.set(key, n, expires_on, tag=key % 4)
+                ttl_cache.get((key + 1) % 128)
+                if n % 50 == 0:
+                    ttl_cache.invalidate(n % 4)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=churn, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(ttl_cache) <= 64
+
+
+def test_concurrent_logins_respect_session_limit(run, make_user, monkeypatch):
+    monkeypatch.setattr(config, "SECURITY_MAX_SESSIONS", 5)
+    user = make_user(sessions=4, expired=1)
+    client = ASGIClient(api_main)
+    form = dict(username=user.username, password=user.password)
+
+    async def login_concurrently():
+        logins = [client.request("POST", "/token", form=form) for _ in range(3)]
+        return await asyncio.gather(*logins)
+
+    statuses = sorted(status for status, _ in run(login_concurrently()))
+    assert statuses == [200, 403, 403]
+
+    with orm.orm_session() as session:
+        live = session.scalar(select(func.count())\
+            .where(orm.users.UserSession.owner_id == user.id)\
+            .where(orm.users.UserSession.invalid_on > common.current_timestamp()))
+        counted = session.scalar(select(orm.users.User.active_sessions)\
+            .where(orm.users.User.id == user.id))
+    assert live == counted == 5
+
+
+def test_session_writes_run_concurrently(run, make_user):
+    users = [make_user(sessions=2, expired=2) for _ in range(3)]
+    client = ASGIClient(api_main)
+
+    async def churn():
+        calls = []
+        for user in users:
+            form = dict(username=user.username, password=user.password)
+            calls.append(client.request("POST", "/token", form=form))
+            calls.append(client.request("POST", "/logout", headers={"authorization": f"Bearer {user.tokens[0]}"}))
+            calls.append(models.async_sweep_expired_sessions(batch_size=1))
+            calls.append(models.async_refresh_revoked_sessions())
+        return await asyncio.gather(*calls)
+
+    results = run(churn())
+    assert [status for status, _ in results[0::4]] == [200] * len(users)
+    assert [status for status, _ in results[1::4]] == [200] * len(users)
+
+    with orm.orm_session() as session:
+        for user in users:
+            live = session.scalar(select(func.count())\
+                .where(orm.users.UserSession.owner_id == user.id))
+            counted = session.scalar(select(orm.users.User.active_sessions)\
+                .where(orm.users.User.id == user.id))
+            assert live == counted == 2
+
+
+def test_sweep_deletes_expired_sessions_in_batches(run, make_user):
+    user = make_user(sessions=1, expired=3)
+    runs = models.users.sweeper_stats["runs"]
+
+    assert run(models.async_sweep_expired_sessions(batch_size=2)) >= 3
+    assert models.users.sweeper_stats["runs"] == runs + 1
+    assert run(models.async_sweep_expired_sessions(batch_size=2)) == 0
+
+    with orm.orm_session() as session:
+        live = session.scalar(select(func.count())\
+            .where(orm.users.UserSession.owner_id == user.id))
+        counted = session.scalar(select(orm.users.User.active_sessions)\
+            .where(orm.users.User.id == user.id))
+    assert live == counted == 1
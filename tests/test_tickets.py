@@ -0,0 +1,89 @@
+import asyncio, contextlib, json
+
+import models
+from models import pyd
+
+
+def test_export_requires_privileged_role(client, make_user):
+    owner = make_user(tickets=2, messages=1)
+
+    status, _ = client("GET", "/tickets/export", token=owner.tokens[0])
+    assert status == 403
+
+    for role in (pyd.users.UserRoleEnum.SERVICE, pyd.users.UserRoleEnum.ADMINISTRATOR):
+        status, body = client("GET", "/tickets/export", token=make_user(role).tokens[0])
+        assert status == 200
+        exported = {json.loads(line)["id"] for line in body.decode().splitlines()}
+        assert {ticket_id.hex for ticket_id in owner.ticket_ids} <= {i.replace("-", "") for i in exported}
+
+
+def test_import_requires_privileged_role(client, make_user):
+    status, _ = client\
+        ("POST", "/tickets/import", token=make_user().tokens[0], body=b"")
+    assert status == 403
+
+
+def test_concurrent_claims_take_distinct_tickets(run, make_user):
+    make_user(tickets=8)
+    agent = make_user(pyd.users.UserRoleEnum.SERVICE)
+
+    async def claim_all():
+        claims = [models.async_claim_tickets(agent.id, limit=2) for _ in range(4)]
+        return await asyncio.gather(*claims)
+
+    claimed = [ticket.id for tickets in run(claim_all()) for ticket in tickets]
+    assert len(claimed) == 8
+    assert len(set(claimed)) == len(claimed)
+
+
+def test_cancelled_claim_releases_the_queue(run, make_user):
+    make_user(tickets=1)
+    agent = make_user(pyd.users.UserRoleEnum.SERVICE)
+
+    async def cancel_waiting_claim():
+        async with models.tickets._claim_lock:
+            waiting = asyncio.ensure_future(models.async_claim_tickets(agent.id))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await waiting
+        return await asyncio.wait_for(models.async_claim_tickets(agent.id), 5)
+
+    assert len(run(cancel_waiting_claim())) == 1
+
+
+def test_tickets_of_other_users_are_not_listed(client, make_user):
+    owner, other = make_user(tickets=2), make_user(tickets=1)
+
+    status, _ = client("GET", f"/tickets?owner_id={owner.id}", token=other.tokens[0])
+    assert status == 403
+
+    status, body = client("GET", "/tickets?limit=500", token=other.tokens[0])
+    assert status == 200
+    listed = {ticket["id"] for ticket in json.loads(body)["tickets"]}
+    assert listed == {str(ticket_id) for ticket_id in other.ticket_ids}
+
+    status, body = client\
+        ("GET", f"/tickets?owner_id={owner.id}", token=make_user(pyd.users.UserRoleEnum.SERVICE).tokens[0])
+    assert status == 200
+    assert len(json.loads(body)["tickets"]) == 2
+
+
+def test_ticket_of_another_user_is_not_found(client, make_user):
+    owner, other = make_user(tickets=1), make_user()
+    path = f"/tickets/{owner.ticket_ids[0]}"
+
+    assert client("GET", path, token=owner.tokens[0])[0] == 200
+    assert client("GET", path, token=other.tokens[0])[0] == 404
+    assert client("GET", path, token=make_user(pyd.users.UserRoleEnum.ADMINISTRATOR).tokens[0])[0] == 200
+
+
+def test_claim_requires_agent_role(client, make_user):
+    make_user(tickets=1)
+
+    status, _ = client("POST", "/tickets/claim", token=make_user().tokens[0])
+    assert status == 403
+
+    status, body = client("POST", "/tickets/claim", token=make_user(pyd.users.UserRoleEnum.SERVICE).tokens[0])
+    assert status == 200
+    assert len(json.loads(body)) == 1
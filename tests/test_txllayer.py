@@ -0,0 +1,106 @@
+"""
+Compiled translators, trusted or validated, and
+the type-keyed dispatch to them.
+"""
+
+import pytest
+
+from models import orm, pyd, txllayer
+from models.orm.engine import select
+from models.tickets import TICKET_EXPORT_PLAN
+from models.users import USER_FULL_PLAN
+
+
+def _load(plan, *where):
+    with orm.orm_session() as session:
+        return session.scalars(plan.apply(select(plan.model).where(*where))).unique().one()
+
+
+def test_trusted_translation_matches_validated(make_user):
+    user = make_user(sessions=2, tickets=2, messages=2)
+    orm_user = _load(USER_FULL_PLAN, orm.users.User.id == user.id)
+
+    trusted = txllayer.translate(orm_user, trusted=True)
+    validated = txllayer.translate(orm_user)
+    assert type(trusted) is type(validated) is pyd.users.UserM
+    assert trusted.dict() == validated.dict()
+    assert len(trusted.user_sessions) == 2
+    assert all(type(s) is pyd.users.UserSessionM for s in trusted.user_sessions)
+    assert type(trusted.user_contacts) is pyd.users.UserContactM
+
+
+def test_compiled_export_matches_model_validation(make_user):
+    user = make_user(tickets=1, messages=3)
+    ticket = _load(TICKET_EXPORT_PLAN, orm.tickets.ServiceTicket.id == user.ticket_ids[0])
+
+    compiled = txllayer.consume_orm2pyd(ticket, pyd.tickets.ServiceTicketExportM, trusted=True)
+    expected = pyd.tickets.ServiceTicketExportM\
+    (
+        **{name: getattr(ticket, name) for name in pyd.tickets.ServiceTicketM.__fields__},
+        messages=\
+        [
+            pyd.messages.MessageM(**{name: getattr(message, name) for name in pyd.messages.MessageM.__fields__})
+            for message in ticket.messages
+        ]
+    )
+    assert compiled.dict() == expected.dict()
+    assert len(compiled.messages) == 3
+
+
+def test_translators_are_compiled_once():
+    translator = txllayer.compile_txl(orm.tickets.ServiceTicket, pyd.tickets.ServiceTicketM)
+    assert txllayer.compile_txl(orm.tickets.ServiceTicket, pyd.tickets.ServiceTicketM) is translator
+    assert txllayer.retrieve_txl(orm.tickets.ServiceTicket) is translator
+
+
+class _AuditedUserM(pyd.users.UserM):
+    pass
+
+
+class _AuditedAdminM(_AuditedUserM):
+    pass
+
+
+@pytest.fixture
+def restore_registrations():
+    registered = dict(txllayer.pyd2pyd_mapping)
+    yield
+    txllayer.pyd2pyd_mapping.clear()
+    txllayer.pyd2pyd_mapping.update(registered)
+    txllayer.dispatch_cache.clear()
+
+
+def test_subclasses_dispatch_through_mro(restore_registrations):
+    txllayer.dispatch_cache.clear()
+
+    assert txllayer.retrieve_txl(_AuditedAdminM) is txllayer.user2orm
+    assert txllayer.dispatch_cache[_AuditedAdminM] is txllayer.user2orm
+    assert txllayer.retrieve_txl(_AuditedAdminM) is txllayer.user2orm
+
+
+def test_registering_clears_dispatch_cache(restore_registrations):
+    assert txllayer.retrieve_txl(_AuditedAdminM) is txllayer.user2orm
+
+    @txllayer.register_txl(_AuditedUserM)
+    def audited2orm(obj):
+        return obj
+
+    assert not txllayer.dispatch_cache
+    assert txllayer.retrieve_txl(_AuditedAdminM) is audited2orm
+    assert txllayer.retrieve_txl(_AuditedUserM) is audited2orm
+
+
+def test_unregistered_type_raises():
+    with pytest.raises(KeyError):
+        txllayer.retrieve_txl(pyd.tickets.TicketCountsM)
+
+
+def test_translate_many_mixed_types(make_user):
+    user = make_user(tickets=2, messages=1)
+    ticket = _load(TICKET_EXPORT_PLAN, orm.tickets.ServiceTicket.id == user.ticket_ids[0])
+    other = _load(TICKET_EXPORT_PLAN, orm.tickets.ServiceTicket.id == user.ticket_ids[1])
+
+    translated = txllayer.translate_many([ticket, other, ticket.messages[0]], trusted=True)
+    assert [type(model) for model in translated] ==\
+        [pyd.tickets.ServiceTicketM, pyd.tickets.ServiceTicketM, pyd.messages.MessageM]
+    assert translated[0] == txllayer.translate(ticket, trusted=True)